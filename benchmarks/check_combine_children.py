@@ -0,0 +1,150 @@
+"""
+Check of combine_children against the BMesh based combination it replaces.
+
+Builds a parent with transformed children, one with custom split normals and one with a Weighted Normal modifier,
+combines them with combine_children and with BMesh, and compares the resulting meshes.
+Exits with an error code on any difference.
+
+Usage:
+    blender --background --factory-startup --python benchmarks/check_combine_children.py
+"""
+
+import sys
+from pathlib import Path
+
+import bmesh
+import bpy
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import source as addon  # noqa: E402
+from source.utils import combine_children, get_with_children  # noqa: E402
+
+# The corners are rounded to 3 decimals to be sorted, the comparison allows the rounding differences
+tolerance = 2e-3
+
+
+def reset_scene():
+    for collection in [bpy.data.objects, bpy.data.meshes]:
+        for item in list(collection):
+            collection.remove(item)
+
+
+def add_mesh_object(name, build, parent=None):
+    bm = bmesh.new()
+    build(bm)
+    mesh = bpy.data.meshes.new(name)
+    bm.to_mesh(mesh)
+    bm.free()
+    mesh.uv_layers.new(name="UVMap")
+    obj = bpy.data.objects.new(name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    obj.parent = parent
+    return obj
+
+
+def build_scene(custom_normals):
+    """Parent cube with a rotated, scaled sphere and a bevelled cube as children"""
+    parent = add_mesh_object("parent", lambda bm: bmesh.ops.create_cube(bm, size=1))
+    parent.location = (1, 0, 0)
+    parent.rotation_euler = (0, 0, 0.4)
+
+    sphere = add_mesh_object(
+        "sphere", lambda bm: bmesh.ops.create_uvsphere(bm, u_segments=12, v_segments=8, radius=0.5), parent
+    )
+    sphere.location = (0, 2, 0)
+    sphere.rotation_euler = (0.3, 0.2, 0.1)
+    sphere.scale = (1, 2, 0.5)
+    sphere.data.shade_smooth()
+    if custom_normals:
+        # Every corner points up, far from the normals Blender would compute
+        sphere.data.normals_split_custom_set([(0, 0, 1)] * len(sphere.data.loops))
+
+    bevelled = add_mesh_object("bevelled", lambda bm: bmesh.ops.create_cube(bm, size=1), parent)
+    bevelled.location = (0, -2, 0)
+    bevelled.scale = (2, 1, 1)
+    bevelled.data.shade_smooth()
+    if custom_normals:
+        bevelled.modifiers.new("bevel", "BEVEL").segments = 2
+        bevelled.modifiers.new("weighted_normal", "WEIGHTED_NORMAL")
+
+    bpy.context.view_layer.update()
+    return parent
+
+
+def combine_with_bmesh(mesh_object):
+    """The previous implementation of combine_children"""
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    bm = bmesh.new()
+    for child in get_with_children(mesh_object):
+        it_data = bpy.data.meshes.new_from_object(child.evaluated_get(depsgraph))
+        it_data.transform(child.matrix_world)
+        it_data.transform(mesh_object.matrix_world.inverted())
+        bm.from_mesh(it_data)
+        bpy.data.meshes.remove(it_data)
+
+    mesh_data = bpy.data.meshes.new("reference_mesh")
+    bm.normal_update()
+    bm.to_mesh(mesh_data)
+    bm.free()
+    mesh_data.update()
+    return mesh_data
+
+
+def describe(mesh):
+    """Corners, normals and UVs of a mesh, sorted so that the order does not matter"""
+    positions = np.empty((len(mesh.vertices), 3))
+    mesh.vertices.foreach_get("co", positions.reshape(-1))
+    corner_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", corner_verts)
+    normals = np.empty((len(mesh.loops), 3))
+    mesh.corner_normals.foreach_get("vector", normals.reshape(-1))
+
+    corners = [positions[corner_verts], normals]
+    for uv_layer in mesh.uv_layers:
+        uvs = np.empty((len(mesh.loops), 2))
+        uv_layer.uv.foreach_get("vector", uvs.reshape(-1))
+        corners.append(uvs)
+    corners = np.round(np.concatenate(corners, axis=1), 3)
+    return {
+        "vertices": len(mesh.vertices),
+        "polygons": len(mesh.polygons),
+        "has_custom_normals": mesh.has_custom_normals,
+        "uv_maps": [uv_layer.name for uv_layer in mesh.uv_layers],
+        "corners": corners[np.lexsort(corners.T[::-1])],
+    }
+
+
+def compare(name, combined, reference):
+    errors = []
+    for key, expected in reference.items():
+        value = combined[key]
+        if isinstance(expected, np.ndarray):
+            if value.shape != expected.shape or not np.allclose(value, expected, atol=tolerance):
+                errors.append(f"{name}: {key} differ")
+        elif value != expected:
+            errors.append(f"{name}: {key} is {value}, expected {expected}")
+    return errors
+
+
+def main():
+    addon.register()
+
+    errors = []
+    for custom_normals in [False, True]:
+        reset_scene()
+        parent = build_scene(custom_normals)
+        combined = combine_children("combined", parent)
+        reference = combine_with_bmesh(parent)
+        name = "custom normals" if custom_normals else "computed normals"
+        errors.extend(compare(name, describe(combined.data), describe(reference)))
+
+    for error in errors:
+        print(error)
+    print("Combine check failed" if errors else "Combine check passed")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Round-trip check of the native FBX writer against the FBX operator it replaces.
+
+Builds a few meshes, writes each one with the native writer and with bpy.ops.export_scene.fbx, imports both files
+with Blender's FBX importer and compares the imported meshes. Exits with an error code on any difference.
+
+Usage:
+    blender --background --factory-startup --python benchmarks/check_fbx_writer.py
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import bmesh
+import bpy
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import source as addon  # noqa: E402
+from source.export_meshes import fbx_export_options  # noqa: E402
+from source.fbx_writer import write_fbx  # noqa: E402
+
+# The corners are rounded to 3 decimals to be sorted, the comparison allows the rounding differences
+tolerance = 2e-3
+
+
+def reset_scene():
+    for collection in [bpy.data.objects, bpy.data.meshes, bpy.data.materials]:
+        for item in list(collection):
+            collection.remove(item)
+
+
+def build_cube():
+    """Cube with two materials, a second UV map, sharp edges and a transform"""
+    bm = bmesh.new()
+    bmesh.ops.create_cube(bm, size=1)
+    mesh = bpy.data.meshes.new("cube")
+    bm.to_mesh(mesh)
+    bm.free()
+    mesh.uv_layers.new(name="UVMap")
+    mesh.uv_layers.new(name="Lightmap")
+    for name in ["Red", "Blue"]:
+        mesh.materials.append(bpy.data.materials.new(name))
+    mesh.polygons.foreach_set("material_index", [i % 2 for i in range(len(mesh.polygons))])
+    mesh.shade_smooth()
+    sharp = mesh.attributes.new("sharp_edge", "BOOLEAN", "EDGE")
+    sharp.data.foreach_set("value", [i % 3 == 0 for i in range(len(mesh.edges))])
+
+    obj = bpy.data.objects.new("cube", mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    obj.location = (1, 2, 3)
+    obj.rotation_euler = (0.3, 0.2, 0.1)
+    obj.scale = (1, 2, 0.5)
+    return obj
+
+
+def build_grid():
+    """Grid with an ngon and the default material slot"""
+    bm = bmesh.new()
+    bmesh.ops.create_grid(bm, x_segments=8, y_segments=6, size=2)
+    bmesh.ops.dissolve_faces(bm, faces=bm.faces[:4])
+    mesh = bpy.data.meshes.new("grid")
+    bm.to_mesh(mesh)
+    bm.free()
+    mesh.uv_layers.new(name="UVMap")
+    obj = bpy.data.objects.new("grid", mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+
+def build_empty():
+    """Empty without children, the writers must skip it"""
+    obj = bpy.data.objects.new("empty", None)
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+
+def import_fbx(path: Path):
+    """Import a file and return the imported mesh objects, removed by the next reset_scene"""
+    before = set(bpy.data.objects)
+    bpy.ops.import_scene.fbx(filepath=str(path))
+    return [obj for obj in bpy.data.objects if obj not in before and obj.type == "MESH"]
+
+
+def import_single_mesh(path: Path):
+    imported = import_fbx(path)
+    if len(imported) != 1:
+        raise AssertionError(f"Expected a single mesh in '{path.name}', found {len(imported)}")
+    return imported[0]
+
+
+def describe(obj):
+    """World space corners, normals and UVs of an imported mesh, sorted so that the order does not matter"""
+    mesh = obj.data
+    matrix = np.array(obj.matrix_world, dtype=np.float64)
+
+    positions = np.empty((len(mesh.vertices), 3))
+    mesh.vertices.foreach_get("co", positions.reshape(-1))
+    positions = positions @ matrix[:3, :3].T + matrix[:3, 3]
+    corner_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", corner_verts)
+
+    normals = np.empty((len(mesh.loops), 3))
+    mesh.corner_normals.foreach_get("vector", normals.reshape(-1))
+    normals = normals @ np.linalg.inv(matrix[:3, :3]).T
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+
+    corners = [positions[corner_verts], normals]
+    for uv_layer in mesh.uv_layers:
+        uvs = np.empty((len(mesh.loops), 2))
+        uv_layer.uv.foreach_get("vector", uvs.reshape(-1))
+        corners.append(uvs)
+    corners = np.round(np.concatenate(corners, axis=1), 3)
+
+    materials = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", materials)
+    return {
+        "vertices": len(mesh.vertices),
+        "edges": len(mesh.edges),
+        "polygons": len(mesh.polygons),
+        "uv_maps": [uv_layer.name for uv_layer in mesh.uv_layers],
+        "materials": [material.name.split(".")[0] for material in mesh.materials],
+        "material_indices": sorted(materials.tolist()),
+        "corners": corners[np.lexsort(corners.T[::-1])],
+    }
+
+
+def compare(name, native, reference):
+    errors = []
+    for key, expected in reference.items():
+        value = native[key]
+        if isinstance(expected, np.ndarray):
+            if value.shape != expected.shape or not np.allclose(value, expected, atol=tolerance):
+                errors.append(f"{name}: {key} differ")
+        elif value != expected:
+            errors.append(f"{name}: {key} is {value}, expected {expected}")
+    return errors
+
+
+def check_object(obj, export_path: Path, unit_system):
+    bpy.context.scene.unit_settings.system = unit_system
+    native_path = export_path / f"{obj.name}_native.fbx"
+    reference_path = export_path / f"{obj.name}_operator.fbx"
+
+    write_fbx(bpy.context, [(obj.name, obj)], native_path)
+
+    bpy.ops.object.select_all(action="DESELECT")
+    obj.select_set(True)
+    bpy.ops.export_scene.fbx(filepath=str(reference_path), **fbx_export_options)
+
+    native = describe(import_single_mesh(native_path))
+    reference = describe(import_single_mesh(reference_path))
+    return compare(f"{obj.name} ({unit_system})", native, reference)
+
+
+def check_empty(export_path: Path):
+    """An empty alone and an empty written with a mesh, like an asset and a batch member"""
+    errors = []
+    for objects in [[build_empty()], [build_empty(), build_grid()]]:
+        name = "+".join(obj.name for obj in objects)
+        native_path = export_path / f"{name}_native.fbx"
+        reference_path = export_path / f"{name}_operator.fbx"
+
+        write_fbx(bpy.context, [(obj.name, obj) for obj in objects], native_path)
+
+        bpy.ops.object.select_all(action="DESELECT")
+        for obj in objects:
+            obj.select_set(True)
+        bpy.ops.export_scene.fbx(filepath=str(reference_path), **fbx_export_options)
+
+        native = len(import_fbx(native_path))
+        reference = len(import_fbx(reference_path))
+        if native != reference:
+            errors.append(f"{name}: {native} meshes, expected {reference}")
+    return errors
+
+
+def main():
+    addon.register()
+
+    errors = []
+    with tempfile.TemporaryDirectory(prefix="fbx_check_") as export_path:
+        for build in [build_cube, build_grid]:
+            for unit_system in ["METRIC", "NONE"]:
+                reset_scene()
+                errors.extend(check_object(build(), Path(export_path), unit_system))
+        reset_scene()
+        errors.extend(check_empty(Path(export_path)))
+
+    for error in errors:
+        print(error)
+    print("FBX writer check failed" if errors else "FBX writer check passed")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Export benchmark suite, generates synthetic scenes and times each stage of the export pipeline.
+The scenes are exported with export_assets, the stages are read from the export profiler.
+
+Usage:
+    blender --background --factory-startup --python benchmarks/run_benchmarks.py -- --output results.json
+    blender --background --factory-startup --python benchmarks/run_benchmarks.py -- --baseline results.json
+    blender --background --factory-startup --python benchmarks/run_benchmarks.py -- --set use_native_writer=true
+
+Peak RSS is the high-water mark of the whole process, run a single `--scenario` per process to measure it in isolation.
+"""
+
+import argparse
+import json
+import math
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import bpy
+import bmesh
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import source as addon  # noqa: E402
+from source import profiling  # noqa: E402
+from source.export_meshes import export_assets, list_meshes  # noqa: E402
+from source.utils import get_or_create_export_collection  # noqa: E402
+
+stage_names = [
+    "collection_scan",
+    "fingerprint",
+    "mode_switch",
+    "combine",
+    "evaluate",
+    "reduce",
+    "bake",
+    "fbx_write",
+    "image_save",
+]
+
+
+def enable_vertex_animation():
+    """
+    Turns on the vertex animation gate in every module of the addon that imported it, so that the vertex_animation
+    scenario bakes and saves the textures. The workers of parallel exports are separate processes that keep it off.
+    """
+    for name, module in list(sys.modules.items()):
+        if name.partition(".")[0] == addon.__name__ and hasattr(module, "FT_VertexAnimation"):
+            module.FT_VertexAnimation = True
+
+
+def get_peak_rss_mb():
+    """Return the peak resident set size of the process in megabytes, None if not available"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def reset_scene():
+    """Remove all the data created by the previous scenario"""
+    for collection in [bpy.data.objects, bpy.data.meshes, bpy.data.images, bpy.data.collections]:
+        for item in list(collection):
+            collection.remove(item)
+    scene = bpy.context.scene
+    scene.frame_start = 1
+    scene.frame_end = 2
+    scene.frame_step = 1
+    scene.frame_set(1)
+
+
+def new_mesh_object(name, build, collection):
+    bm = bmesh.new()
+    build(bm)
+    mesh = bpy.data.meshes.new(name)
+    bm.to_mesh(mesh)
+    bm.free()
+    mesh.uv_layers.new()
+    obj = bpy.data.objects.new(name, mesh)
+    collection.objects.link(obj)
+    return obj
+
+
+def flag_for_export(obj, combine_child=False, vertex_animation=False):
+    obj.export_properties.enable_export = True
+    obj.export_properties.combine_child = combine_child
+    obj.export_properties.vertex_animation = vertex_animation
+
+
+def build_small_props(scale):
+    collection = get_or_create_export_collection()
+    for i in range(int(400 * scale)):
+        obj = new_mesh_object(
+            f"prop_{i:04d}",
+            lambda bm: bmesh.ops.create_uvsphere(bm, u_segments=12, v_segments=8, radius=0.5),
+            collection,
+        )
+        obj.location = (i % 20, i // 20, 0)
+        flag_for_export(obj)
+
+
+def build_huge_meshes(scale):
+    collection = get_or_create_export_collection()
+    segments = int(700 * math.sqrt(scale))
+    for i in range(3):
+        obj = new_mesh_object(
+            f"huge_{i}",
+            lambda bm: bmesh.ops.create_grid(bm, x_segments=segments, y_segments=segments, size=10),
+            collection,
+        )
+        obj.location = (i * 25, 0, 0)
+        flag_for_export(obj)
+
+
+def build_deep_hierarchies(scale):
+    collection = get_or_create_export_collection()
+    depth = 6
+    fan_out = 3
+    for i in range(max(1, int(4 * scale))):
+        root = new_mesh_object(f"kit_{i}", lambda bm: bmesh.ops.create_cube(bm, size=1), collection)
+        root.location = (i * 10, 0, 0)
+        flag_for_export(root, combine_child=True)
+
+        parents = [root]
+        for level in range(depth):
+            children = []
+            for parent in parents[:fan_out]:
+                for j in range(fan_out):
+                    child = new_mesh_object(
+                        f"kit_{i}_{level}_{len(children)}",
+                        lambda bm: bmesh.ops.create_cube(bm, size=0.5),
+                        collection,
+                    )
+                    child.parent = parent
+                    child.location = (j - 1, 0, 1)
+                    child.rotation_euler = (0, 0, j * 0.3)
+                    children.append(child)
+            parents = children
+
+
+def build_vertex_animation(scale):
+    collection = get_or_create_export_collection()
+    scene = bpy.context.scene
+    scene.frame_start = 1
+    scene.frame_end = 1 + int(240 * scale)
+    for i in range(2):
+        obj = new_mesh_object(
+            f"crowd_{i}",
+            lambda bm: bmesh.ops.create_grid(bm, x_segments=140, y_segments=140, size=2),
+            collection,
+        )
+        obj.location = (i * 5, 0, 0)
+        # The wave modifier animates the mesh without any keyframe
+        wave = obj.modifiers.new("Wave", "WAVE")
+        wave.speed = 0.05
+        flag_for_export(obj, vertex_animation=True)
+
+
+scenarios = {
+    "small_props": build_small_props,
+    "huge_meshes": build_huge_meshes,
+    "deep_hierarchies": build_deep_hierarchies,
+    "vertex_animation": build_vertex_animation,
+}
+
+
+def parse_setting(text):
+    """Parse a `name=value` export setting, the value is converted to the type of the current setting"""
+    name, _, value = text.partition("=")
+    props = bpy.context.scene.asset_settings
+    if not hasattr(props, name):
+        raise ValueError(f"Unknown export setting '{name}'")
+    current = getattr(props, name)
+    if isinstance(current, bool):
+        return name, value.lower() in ("1", "true", "yes", "on")
+    if isinstance(current, (int, float)):
+        return name, type(current)(value)
+    return name, value
+
+
+def report(kind, message):
+    if kind & {"ERROR", "WARNING"}:
+        print(f"{', '.join(sorted(kind))}: {message}")
+
+
+def run_scenario(name, scale, settings, jobs):
+    reset_scene()
+    scenarios[name](scale)
+
+    props = bpy.context.scene.asset_settings
+    props.enable_profiling = True
+    for setting, value in settings:
+        setattr(props, setting, value)
+    if name == "vertex_animation":
+        # The parallel workers run without the vertex animation gate and are not profiled
+        jobs = 1
+
+    count = len(list_meshes())
+    with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as export_path:
+        start = time.perf_counter()
+        _status, failed = export_assets(bpy.context, Path(export_path), report, jobs=jobs)
+        total = time.perf_counter() - start
+
+    summary = profiling.last_summary
+    if name == "vertex_animation" and not summary["stages"].get("bake"):
+        raise AssertionError("The vertex_animation scenario did not bake any vertex animation")
+    return {
+        "assets": count,
+        "failed": failed,
+        "jobs": jobs,
+        "total": total,
+        "stages": {stage: summary["stages"].get(stage, 0.0) for stage in stage_names},
+        "peak_rss_mb": get_peak_rss_mb(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print the comparison against the baseline, returns False if any stage regressed"""
+    ok = True
+    for name, result in results["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        for stage in ["total", *stage_names]:
+            current = result["total"] if stage == "total" else result["stages"][stage]
+            previous = base["total"] if stage == "total" else base["stages"].get(stage, 0.0)
+            # Ignore stages too short to be measured reliably
+            if previous < 0.01:
+                continue
+            ratio = current / previous
+            regressed = ratio > 1 + tolerance
+            ok = ok and not regressed
+            marker = "REGRESSION" if regressed else ""
+            print(f"{name:>20} {stage:>16}: {previous:8.3f}s -> {current:8.3f}s ({ratio:5.2f}x) {marker}")
+    return ok
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="run_benchmarks")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare the results against a previous JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before failing")
+    parser.add_argument("--scenario", action="append", choices=list(scenarios), help="Run only these scenarios")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier applied to the scene sizes")
+    parser.add_argument("--jobs", type=int, help="Number of parallel jobs, the scene setting by default")
+    parser.add_argument(
+        "--set",
+        dest="settings",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="Export setting of the scene, like use_native_writer=true",
+    )
+    args = parser.parse_args(argv)
+
+    addon.register()
+    enable_vertex_animation()
+    settings = [parse_setting(text) for text in args.settings]
+
+    results = {
+        "blender_version": bpy.app.version_string,
+        "scale": args.scale,
+        "settings": dict(settings),
+        "jobs": args.jobs,
+        "scenarios": {},
+    }
+    for name in args.scenario or list(scenarios):
+        print(f"Running scenario '{name}'")
+        results["scenarios"][name] = run_scenario(name, args.scale, settings, args.jobs)
+        print(json.dumps(results["scenarios"][name], indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
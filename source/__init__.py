@@ -1,21 +1,35 @@
 import bpy
 
 from .armature_tools import armature_classes
-from .properties import ExportSceneProperties, ObjectProperties
+from .cli import cli_command_id, run as run_cli
+from .properties import ExportSceneProperties, ObjectProperties, VertexAnimationClip
 from .right_panel import VIEW3D_PT_AssetManager
-from .export_meshes import ExportAssets
+from .export_meshes import ExportAssets, register_export_handlers, unregister_export_handlers
+from .export_index import register_handlers, unregister_handlers
 from .utils import get_or_create_export_collection
+from .vertex_clips import clip_classes
 
 operator_classes = [
     ExportAssets,
     VIEW3D_PT_AssetManager,
     ExportSceneProperties,
+    VertexAnimationClip,
     ObjectProperties,
     *armature_classes,
+    *clip_classes,
 ]
 
+cli_command = None
+
+
+def create_export_collection():
+    """Startup timer, returns None so that it runs only once"""
+    get_or_create_export_collection()
+
 
 def register():
+    global cli_command
+
     for cls in operator_classes:
         bpy.utils.register_class(cls)
 
@@ -23,8 +37,17 @@ def register():
     bpy.types.Scene.asset_settings = bpy.props.PointerProperty(type=ExportSceneProperties)
     bpy.types.Object.export_properties = bpy.props.PointerProperty(type=ObjectProperties)
 
-    bpy.app.timers.register(get_or_create_export_collection, first_interval=0.1)
+    bpy.app.timers.register(create_export_collection, first_interval=0.1)
+    register_handlers()
+    register_export_handlers()
+
+    # blender -b scene.blend --command asset_export --output ./out
+    cli_command = bpy.utils.register_cli_command(cli_command_id, run_cli)
 
 def unregister():
+    bpy.utils.unregister_cli_command(cli_command)
+    unregister_handlers()
+    unregister_export_handlers()
+
     for cls in reversed(operator_classes):
         bpy.utils.unregister_class(cls)
@@ -2,7 +2,7 @@ import math
 
 import bpy
 import bmesh
-from mathutils import Vector
+from mathutils import Vector, kdtree
 import sys
 import time
 
@@ -95,6 +95,7 @@ class AT_SymmetrizeTool(bpy.types.Operator):
 
         print("=== Symmetrize Start ===")
         bm = bmesh.from_edit_mesh(obj.data)
+        bm.verts.ensure_lookup_table()
         bm.edges.ensure_lookup_table()
 
         # Get UV layer
@@ -115,6 +116,12 @@ class AT_SymmetrizeTool(bpy.types.Operator):
 
         all_uvs = [get_uv(v) for v in bm.verts]
 
+        # Index the uvs to find the mirrored vertices without scanning the whole mesh
+        uv_tree = kdtree.KDTree(len(all_uvs))
+        for index, uv in enumerate(all_uvs):
+            uv_tree.insert((uv.x, uv.y, 0), index)
+        uv_tree.balance()
+
         count_matched = 0
         count_unmatched = 0
         bpy.ops.mesh.select_all(action="DESELECT")
@@ -134,11 +141,13 @@ class AT_SymmetrizeTool(bpy.types.Operator):
             # Find a vertex with the same uv
             expected_uv = Vector((1 - uv.x, uv.y))
             similiar_verts = [
-                v2 for v2 in bm.verts if v2 != v and (all_uvs[v2.index] - expected_uv).length < self.tolerance
+                bm.verts[index]
+                for _co, index, _dist in uv_tree.find_range((expected_uv.x, expected_uv.y, 0), self.tolerance)
+                if index != v.index and (all_uvs[index] - expected_uv).length < self.tolerance
             ]
             if len(similiar_verts) >= 1:
                 # Find the closest one
-                similiar_verts.sort(key=lambda v2: (all_uvs[v2.index] - expected_uv).length)
+                similiar_verts.sort(key=lambda v2: ((all_uvs[v2.index] - expected_uv).length, v2.index))
 
                 v2 = similiar_verts[0]
                 v.co = Vector((-v2.co.x, v2.co.y, v2.co.z))
@@ -156,6 +165,24 @@ class AT_SymmetrizeTool(bpy.types.Operator):
         return {"CANCELLED"}
 
 
+class MeshAdjacency:
+    """Edge to face, face to edge and edge to vertex indices of a bmesh, built once per operation"""
+
+    def __init__(self, bm):
+        bm.verts.index_update()
+        bm.edges.index_update()
+        bm.faces.index_update()
+        bm.edges.ensure_lookup_table()
+        bm.faces.ensure_lookup_table()
+        self.edge_faces = [tuple(face.index for face in edge.link_faces) for edge in bm.edges]
+        self.edge_verts = [frozenset((edge.verts[0].index, edge.verts[1].index)) for edge in bm.edges]
+        self.face_edges = [tuple(edge.index for edge in face.edges) for face in bm.faces]
+
+    def touches(self, edge, other):
+        """Return True if the two edges share a vertex"""
+        return not self.edge_verts[edge].isdisjoint(self.edge_verts[other])
+
+
 class AT_TrisToQuads(bpy.types.Operator):
     """Tris to Quads"""
 
@@ -163,6 +190,12 @@ class AT_TrisToQuads(bpy.types.Operator):
     bl_label = "Tris to Quads"
     bl_options = {"REGISTER", "UNDO"}
 
+    all_selected: bpy.props.BoolProperty(
+        name="All Selected Edges",
+        description="Walk from every selected edge instead of the active one only",
+        default=False,
+    )
+
     @classmethod
     def poll(cls, context):
         return context.edit_object is not None and context.edit_object.type == "MESH"
@@ -170,130 +203,139 @@ class AT_TrisToQuads(bpy.types.Operator):
     def execute(self, context):
         obj = context.edit_object
 
-        print("=== Tris to Quads Start ===")
         bm = bmesh.from_edit_mesh(obj.data)
-        bm.faces.ensure_lookup_table()
 
-        if bm.select_history.active is None:
+        if bm.select_history.active is None and not self.all_selected:
             self.report({"ERROR"}, "No active edge found")
             return {"CANCELLED"}
 
-        # This set contains all the edges that cannot be dissolved
-        confirmed_edges = set()
-        for edge in bm.edges:
-            if edge.select:
-                confirmed_edges.add(edge)
-
-        # This list contains all the edges that should be selected at the end of the operation
-        edges_to_select = set()
+        adjacency = MeshAdjacency(bm)
 
-        # This set contains all the edges that should be dissolved at the end of the operation
-        edges_to_dissolve = set()
+        # This set contains all the edges that cannot be dissolved
+        confirmed_edges = {edge.index for edge in bm.edges if edge.select}
 
         active_edge = bm.select_history.active
+        if self.all_selected:
+            seeds = sorted(confirmed_edges)
+        else:
+            seeds = [active_edge.index]
+        if not seeds:
+            self.report({"ERROR"}, "No selected edge found")
+            return {"CANCELLED"}
+
         bpy.ops.mesh.select_all(action="DESELECT")
 
-        # Start from the active edge
-        remaining_edges = [active_edge]
-        while len(remaining_edges) > 0:
-            edge = remaining_edges.pop()
-            confirmed_edges.add(edge)
-            print("Edge: ", edge)
-            for face in list(edge.link_faces):
-                if not face.is_valid:
-                    continue
-
-                def not_near_current_edge(e):
-                    for v in e.verts:
-                        if v in edge.verts:
-                            return False
-                    return True
-
-                edge_to_dissolve = None
-                edge_to_recurse = None
-                edge_to_select = None
-
-                if len(face.verts) == 4:
-                    # Already a quad
-                    other_edges = [f_edge for f_edge in face.edges if f_edge not in confirmed_edges]
-                    if len(other_edges) == 2:
-                        edge_to_recurse = single_element([f for f in other_edges if not_near_current_edge(f)])
-                        edge_to_select = single_element([f for f in other_edges if f != edge_to_recurse])
-                    pass
-
-                if len(face.verts) == 3:
-                    other_edges = [f_edge for f_edge in face.edges if f_edge not in confirmed_edges]
-
-                    # Find the edge to dissolve
-                    if len(other_edges) == 1:
-                        target_edge = other_edges[0]
-
-                        # The edge should have another face of 3 vertices
-                        other_faces = [f_face for f_face in target_edge.link_faces if f_face != face]
-                        if len(other_faces) == 1 and len(other_faces[0].verts) == 3:
-                            target_face = other_faces[0]
-                            edge_to_dissolve = target_edge
-                            edge_to_recurse = single_element(
-                                [it for it in target_face.edges if it != edge_to_dissolve and not_near_current_edge(it)]
-                            )
-                            edge_to_select = single_element(
-                                [it for it in target_face.edges if it != edge_to_dissolve and it != edge_to_recurse]
-                            )
-
-                    elif len(other_edges) == 2:
-                        for f_edge in other_edges:
-                            if edge_to_dissolve is not None:
-                                break
-
-                            for f_face in f_edge.link_faces:
-                                # Ignore the current face
-                                if f_face != face and len(f_face.verts) == 3:
-                                    other_edges_2 = [
-                                        f_edge_2
-                                        for f_edge_2 in f_face.edges
-                                        if f_edge_2 not in confirmed_edges and f_edge_2 != f_edge
-                                    ]
-                                    if len(other_edges_2) == 1:
-                                        edge_to_dissolve = f_edge
-                                        edge_to_recurse = other_edges_2[0]
-                                        edge_to_select = [f for f in other_edges if f != f_edge][0]
-                                        break
-
-                if edge_to_dissolve is not None:
-                    edges_to_dissolve.add(edge_to_dissolve)
-                    confirmed_edges.add(edge_to_dissolve)
-
-                if edge_to_recurse is not None:
-                    remaining_edges.append(edge_to_recurse)
-
-                if edge_to_select is not None:
-                    edges_to_select.add(edge_to_select)
-                    confirmed_edges.add(edge_to_select)
-
-        # Dissolve edges
-        if len(edges_to_dissolve) > 0:
-            print("Dissolving edges: ", len(edges_to_dissolve))
-            for edge in edges_to_dissolve:
-                edge.select = True
-            bpy.ops.mesh.dissolve_edges(use_verts=False)
+        # Start from the seed edges
+        edges_to_dissolve, edges_to_select = walk_tris_to_quads(adjacency, seeds, confirmed_edges)
+
+        # Dissolve the edges directly, without going through the selection
+        to_dissolve = [bm.edges[index] for index in edges_to_dissolve]
+        to_select = [bm.edges[index] for index in edges_to_select]
+        confirmed = {bm.edges[index] for index in confirmed_edges}
+        if to_dissolve:
+            bmesh.ops.dissolve_edges(bm, edges=to_dissolve, use_verts=False, use_face_split=False)
 
         # Select and exit
-        for edge in edges_to_select:
+        for edge in to_select:
             edge.select = True
 
         # Find another active edge
-        vert = single_element([v for v in active_edge.verts if any(e in edges_to_select for e in v.link_edges)])
-        candidates = [e for e in vert.link_edges if e not in confirmed_edges]
-        if len(candidates) > 0:
-            # Get the candidate most parallel to the active edge
-            print("Candidates: ", len(candidates))
-            candidates.sort(key=lambda e: dot_product_edges(e, active_edge), reverse=True)
-            bm.select_history.add(candidates[0])
+        if active_edge is not None and active_edge.is_valid and not self.all_selected:
+            selected = set(to_select)
+            vert = single_element([v for v in active_edge.verts if any(e in selected for e in v.link_edges)])
+            candidates = [e for e in vert.link_edges if e not in confirmed]
+            if len(candidates) > 0:
+                # Get the candidate most parallel to the active edge
+                candidates.sort(key=lambda e: dot_product_edges(e, active_edge), reverse=True)
+                bm.select_history.add(candidates[0])
 
         bmesh.update_edit_mesh(obj.data)
+        self.report({"INFO"}, f"Dissolved {len(to_dissolve)} edges from {len(seeds)} seeds")
         return {"FINISHED"}
 
 
+def walk_tris_to_quads(adjacency: MeshAdjacency, seeds, confirmed_edges):
+    """
+    Walks the edge loops starting from the seed edge indices, pairing triangles across the edges to dissolve.
+    `confirmed_edges` holds the edges that cannot be dissolved and is updated in place.
+    Returns the indices of the edges to dissolve and of the edges to select.
+    """
+
+    edge_faces = adjacency.edge_faces
+    face_edges = adjacency.face_edges
+    touches = adjacency.touches
+
+    edges_to_select = set()
+    edges_to_dissolve = set()
+
+    remaining_edges = list(reversed(seeds))
+    while len(remaining_edges) > 0:
+        edge = remaining_edges.pop()
+        confirmed_edges.add(edge)
+        for face in edge_faces[edge]:
+            edges = face_edges[face]
+            edge_to_dissolve = None
+            edge_to_recurse = None
+            edge_to_select = None
+
+            other_edges = [f_edge for f_edge in edges if f_edge not in confirmed_edges]
+
+            if len(edges) == 4:
+                # Already a quad
+                if len(other_edges) == 2:
+                    edge_to_recurse = single_element([f for f in other_edges if not touches(f, edge)])
+                    edge_to_select = single_element([f for f in other_edges if f != edge_to_recurse])
+
+            if len(edges) == 3:
+                # Find the edge to dissolve
+                if len(other_edges) == 1:
+                    target_edge = other_edges[0]
+
+                    # The edge should have another face of 3 vertices
+                    other_faces = [f_face for f_face in edge_faces[target_edge] if f_face != face]
+                    if len(other_faces) == 1 and len(face_edges[other_faces[0]]) == 3:
+                        target_face = other_faces[0]
+                        edge_to_dissolve = target_edge
+                        edge_to_recurse = single_element(
+                            [it for it in face_edges[target_face] if it != edge_to_dissolve and not touches(it, edge)]
+                        )
+                        edge_to_select = single_element(
+                            [it for it in face_edges[target_face] if it != edge_to_dissolve and it != edge_to_recurse]
+                        )
+
+                elif len(other_edges) == 2:
+                    for f_edge in other_edges:
+                        if edge_to_dissolve is not None:
+                            break
+
+                        for f_face in edge_faces[f_edge]:
+                            # Ignore the current face
+                            if f_face != face and len(face_edges[f_face]) == 3:
+                                other_edges_2 = [
+                                    f_edge_2
+                                    for f_edge_2 in face_edges[f_face]
+                                    if f_edge_2 not in confirmed_edges and f_edge_2 != f_edge
+                                ]
+                                if len(other_edges_2) == 1:
+                                    edge_to_dissolve = f_edge
+                                    edge_to_recurse = other_edges_2[0]
+                                    edge_to_select = [f for f in other_edges if f != f_edge][0]
+                                    break
+
+            if edge_to_dissolve is not None:
+                edges_to_dissolve.add(edge_to_dissolve)
+                confirmed_edges.add(edge_to_dissolve)
+
+            if edge_to_recurse is not None:
+                remaining_edges.append(edge_to_recurse)
+
+            if edge_to_select is not None:
+                edges_to_select.add(edge_to_select)
+                confirmed_edges.add(edge_to_select)
+
+    return edges_to_dissolve, edges_to_select
+
+
 class AT_PT_ArmatureTools(bpy.types.Panel):
     bl_label = "Armature Tools"
     bl_space_type = "VIEW_3D"
@@ -315,7 +357,11 @@ class AT_PT_ArmatureTools(bpy.types.Panel):
         row.operator("blendertools.symmetrize")
 
         row = layout.row(align=True)
-        row.operator("blendertools.tris_to_quads")
+        operator = row.operator("blendertools.tris_to_quads")
+        operator.all_selected = False
+
+        operator = row.operator("blendertools.tris_to_quads", text="All Selected")
+        operator.all_selected = True
 
 
 armature_classes = [
@@ -0,0 +1,121 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+# Writer queue of the running export, None when the tasks run immediately
+active_queue = None
+
+
+class WriterQueue:
+    """
+    Thread pool running the file writes of the export while the main thread evaluates the next assets.
+    Only data held in memory is queued, the files that Blender writes itself are written in place, see staged_file.
+    `submit` blocks while more than `budget` bytes are waiting to be written, so that memory stays bounded.
+    """
+
+    def __init__(self, workers, budget):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asset_export")
+        self.budget = budget
+        self.pending_bytes = 0
+        self.condition = threading.Condition()
+        self.tasks = []
+
+    def submit(self, function, args, nbytes=0):
+        with self.condition:
+            # A task larger than the budget is accepted once nothing else is pending
+            while self.pending_bytes and self.pending_bytes + nbytes > self.budget:
+                self.condition.wait()
+            self.pending_bytes += nbytes
+        self.tasks.append(self.pool.submit(self.run, function, args, nbytes))
+
+    def run(self, function, args, nbytes):
+        try:
+            function(*args)
+        finally:
+            with self.condition:
+                self.pending_bytes -= nbytes
+                self.condition.notify_all()
+
+    def wait(self):
+        """Waits for the tasks submitted so far, raising the first error"""
+        tasks = self.tasks[:]
+        self.tasks.clear()
+        for task in tasks:
+            task.result()
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+        self.wait()
+
+
+@contextmanager
+def background_session(enabled=True, workers=2, budget_mb=256):
+    """
+    Runs the tasks passed to run_in_background in a WriterQueue for the duration of the export.
+    The session waits for every task on exit and raises the first error.
+    """
+    global active_queue
+
+    if not enabled:
+        yield None
+        return
+
+    active_queue = WriterQueue(workers, budget_mb * 1024 * 1024)
+    try:
+        yield active_queue
+    finally:
+        queue = active_queue
+        active_queue = None
+        queue.close()
+
+
+def run_in_background(function, *args, nbytes=0):
+    """
+    Runs a function in the writer queue of the export session, or immediately outside of a session.
+    The function must not access Blender data, `nbytes` counts against the budget of the queue until it is done.
+    """
+    if active_queue is None:
+        function(*args)
+        return
+    active_queue.submit(function, args, nbytes)
+
+
+def wait_background_tasks():
+    if active_queue is not None:
+        active_queue.wait()
+
+
+def get_pending_bytes():
+    """Return the size of the data waiting in the writer queue of the export session"""
+    if active_queue is None:
+        return 0
+    with active_queue.condition:
+        return active_queue.pending_bytes
+
+
+def write_atomic(path: Path, data: bytes):
+    """Writes a file next to `path` and renames it, readers never see a partially written file"""
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+@contextmanager
+def staged_file(path: Path):
+    """
+    Yields a path next to `path` for a file that Blender writes itself, the file is renamed to `path` on success.
+    The staged file is on the same filesystem, so publishing it is a rename and readers never see a partial file.
+    """
+    staging_path = path.with_name(f".{path.stem}.{os.getpid()}.staging{path.suffix}")
+    try:
+        yield staging_path
+        os.replace(staging_path, path)
+    finally:
+        staging_path.unlink(missing_ok=True)
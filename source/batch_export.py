@@ -0,0 +1,166 @@
+import argparse
+import heapq
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from pathlib import Path
+
+import bpy
+
+from .utils import get_with_children, object_mode_session, run_in_object_mode
+
+
+# Seconds between two checks of the running workers
+worker_poll_interval = 0.05
+
+
+def estimate_vertex_count(mesh_object):
+    """Return the number of vertices exported for an asset, without evaluating it"""
+    objects = get_with_children(mesh_object) if mesh_object.export_properties.combine_child else [mesh_object]
+    return sum(len(obj.data.vertices) for obj in objects if obj.type == "MESH")
+
+
+def split_shards(meshes, count, weights=None, held_back=()):
+    """
+    Splits the assets into `count` shards with a similar total weight, the vertex count by default.
+    Each shard starts with its heaviest assets. The `held_back` assets all go to the first shard,
+    so that no two of them are exported at the same time.
+    """
+
+    if weights is None:
+        weights = {mesh_object.name: estimate_vertex_count(mesh_object) for mesh_object in meshes}
+    names = sorted((mesh_object.name for mesh_object in meshes), key=lambda it: weights[it], reverse=True)
+
+    heap = [(0, i) for i in range(count)]
+    assignment = {}
+    held = [name for name in names if name in held_back]
+    if held:
+        for name in held:
+            assignment[name] = 0
+        heap[0] = (sum(weights[name] for name in held), 0)
+        heapq.heapify(heap)
+
+    for name in names:
+        if name in assignment:
+            continue
+        total, i = heapq.heappop(heap)
+        assignment[name] = i
+        heapq.heappush(heap, (total + weights[name], i))
+
+    shards = [[] for _ in range(count)]
+    for name in names:
+        shards[assignment[name]].append(name)
+    return [shard for shard in shards if shard]
+
+
+def iter_parallel_export(meshes, export_path: Path, jobs, weights=None, held_back=()):
+    """
+    Exports the assets in `jobs` background Blender processes working on a snapshot of the current file,
+    see split_shards for `weights` and `held_back`.
+    Yields (name, result) as the workers finish, with result = {"ok": bool, "error": str | None, "files": [...]},
+    and None while they are running so that the caller is never blocked. Closing the generator kills the workers.
+    """
+
+    with tempfile.TemporaryDirectory(prefix="asset_export_") as temp_dir:
+        temp_dir = Path(temp_dir)
+        snapshot = temp_dir / "snapshot.blend"
+        bpy.ops.wm.save_as_mainfile(filepath=str(snapshot), copy=True, check_existing=False)
+
+        workers = []
+        for i, shard in enumerate(split_shards(meshes, jobs, weights, held_back)):
+            assets_file = temp_dir / f"shard_{i}.json"
+            result_file = temp_dir / f"result_{i}.json"
+            log_file = temp_dir / f"worker_{i}.log"
+            with open(assets_file, "w", encoding="utf-8") as f:
+                json.dump(shard, f)
+
+            expression = f"import importlib; importlib.import_module('{__name__}').run_worker()"
+            command = [
+                bpy.app.binary_path,
+                "--background",
+                str(snapshot),
+                "--python-expr",
+                expression,
+                "--",
+                "--export-path",
+                str(export_path),
+                "--assets",
+                str(assets_file),
+                "--result",
+                str(result_file),
+            ]
+            with open(log_file, "w", encoding="utf-8") as log:
+                process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+            workers.append((process, shard, result_file, log_file))
+
+        try:
+            while workers:
+                finished = [worker for worker in workers if worker[0].poll() is not None]
+                if not finished:
+                    yield None
+                    continue
+
+                for worker in finished:
+                    workers.remove(worker)
+                    yield from get_worker_results(*worker)
+        finally:
+            for process, *_ in workers:
+                process.kill()
+                process.wait()
+
+
+def get_worker_results(process, shard, result_file, log_file):
+    """Yield the (name, result) of each asset of a finished worker"""
+    results = {}
+    if result_file.exists():
+        with open(result_file, "r", encoding="utf-8") as f:
+            results.update(json.load(f))
+    for name in shard:
+        if name not in results:
+            log = log_file.read_text(encoding="utf-8", errors="replace")
+            error = f"Worker exited with code {process.returncode}:\n{log[-2000:]}"
+            results[name] = {"ok": False, "error": error, "files": []}
+        yield name, results[name]
+
+
+def run_worker():
+    """Entry point of a background worker, see `iter_parallel_export`"""
+    from .export_meshes import export_asset
+
+    parser = argparse.ArgumentParser(prog="asset-export-worker")
+    parser.add_argument("--export-path", required=True)
+    parser.add_argument("--assets", required=True, help="JSON file with the names of the assets to export")
+    parser.add_argument("--result", required=True, help="JSON file where the results are written")
+    args = parser.parse_args(sys.argv[sys.argv.index("--") + 1 :])
+
+    # The add-on may not be enabled in the preferences used by the background process
+    if not hasattr(bpy.types.Object, "export_properties"):
+        import addon_utils
+
+        addon_utils.enable(__package__, default_set=False)
+
+    export_path = Path(args.export_path)
+    with open(args.assets, "r", encoding="utf-8") as f:
+        names = json.load(f)
+
+    results = {}
+    with object_mode_session():
+        for name in names:
+            start = time.time()
+            file_output = export_path / f"{name}.fbx"
+            try:
+                with run_in_object_mode():
+                    files = export_asset(bpy.context, bpy.data.objects[name], file_output, export_path)
+                results[name] = {"ok": True, "error": None, "files": [str(file) for file in files]}
+            except Exception:
+                results[name] = {"ok": False, "error": traceback.format_exc(), "files": []}
+            results[name]["time"] = time.time() - start
+            print(f"Exported '{name}' in {results[name]['time']:.2f} seconds")
+
+    with open(args.result, "w", encoding="utf-8") as f:
+        json.dump(results, f)
+
+    sys.exit(0 if all(result["ok"] for result in results.values()) else 1)
@@ -0,0 +1,60 @@
+import argparse
+import sys
+import time
+import traceback
+from pathlib import Path
+
+import bpy
+
+from .export_meshes import export_assets
+
+cli_command_id = "asset_export"
+
+
+def print_report(type, message):
+    """Replacement of Operator.report that prints to the console"""
+    print(f"{'/'.join(sorted(type))}: {message}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog=f"blender --command {cli_command_id}",
+        description="Export the assets of the Export collection without opening the user interface",
+    )
+    parser.add_argument("blend_file", nargs="?", help="File to open, the current file is used if omitted")
+    parser.add_argument("--output", help="Directory to export to, defaults to the path saved in the scene")
+    parser.add_argument("--filter", help="Only export the assets matching this pattern, e.g. 'SM_*'")
+    parser.add_argument("--jobs", type=int, help="Number of parallel worker processes")
+    return parser
+
+
+def run(argv):
+    """Runs the export with command line arguments, returns the exit code"""
+    args = build_parser().parse_args(argv)
+    start = time.time()
+
+    try:
+        if args.blend_file:
+            bpy.ops.wm.open_mainfile(filepath=args.blend_file)
+
+        context = bpy.context
+        export_path = args.output or context.scene.asset_settings.export_path
+        export_path = Path(bpy.path.abspath(export_path))
+        export_path.mkdir(parents=True, exist_ok=True)
+
+        status, failed = export_assets(context, export_path, print_report, name_filter=args.filter, jobs=args.jobs)
+    except Exception:
+        traceback.print_exc()
+        return 1
+
+    print(f"{status} in {time.time() - start:.2f} seconds.")
+    return 1 if failed else 0
+
+
+def main():
+    """
+    Entry point for `--python-expr`, arguments are read after `--`:
+    blender -b scene.blend --python-expr "import <package>.cli as cli; cli.main()" -- --output ./out
+    """
+    argv = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else []
+    sys.exit(run(argv))
@@ -0,0 +1,159 @@
+from contextlib import contextmanager
+
+import bpy
+from bpy.app.handlers import persistent
+
+from .utils import get_or_create_export_collection, relevant_objects, temp_suffix
+
+
+class ExportIndex:
+    """
+    Exportable objects of the Export collection and the objects changed since each export,
+    kept up to date by the depsgraph and file load handlers.
+    """
+
+    def __init__(self):
+        # Names of the exportable objects, None until the next scan
+        self.names = None
+        # Names of the Export collection and its children, for membership checks
+        self.collection_names = set()
+        # Per export key: {object name: generation of its last change}, a missing key means everything changed
+        self.changes = {}
+        self.generation = 0
+        self.last_key = None
+        # True while an export runs, the objects it creates, renames and selects are not changes of the assets
+        self.suspended = False
+
+    def reset(self):
+        """Forgets everything, after loading a file or an undo"""
+        self.names = None
+        self.changes.clear()
+        self.last_key = None
+
+    def scan(self):
+        collection = get_or_create_export_collection()
+        self.collection_names = {collection.name, *(child.name for child in collection.children_recursive)}
+        self.names = {obj.name for obj in collection.all_objects if self.is_exportable(obj)}
+
+    def is_exportable(self, obj):
+        if obj.type not in relevant_objects or not obj.export_properties.enable_export:
+            return False
+        return any(collection.name in self.collection_names for collection in obj.users_collection)
+
+    def get_meshes(self):
+        """Return the exportable objects sorted by name, scanning the Export collection only if needed"""
+        if self.names is None:
+            self.scan()
+        meshes = [bpy.data.objects.get(name) for name in self.names]
+        meshes = [obj for obj in meshes if obj is not None and self.is_exportable(obj)]
+        return sorted(meshes, key=lambda x: x.name.lower())
+
+    def object_updated(self, obj, changed=True):
+        """
+        Records an update of the object, a change of its geometry or transform is also a change
+        of the assets it is a child of. Other updates only refresh its membership.
+        """
+        if self.names is not None:
+            if self.is_exportable(obj):
+                self.names.add(obj.name)
+            else:
+                self.names.discard(obj.name)
+
+        if not changed:
+            return
+        self.generation += 1
+        while obj is not None:
+            for changes in self.changes.values():
+                changes[obj.name] = self.generation
+            obj = obj.parent
+
+    def get_changes(self, key):
+        """
+        Return the names changed since the last export with the same key (export path and settings),
+        None if everything must be checked, and the generation to pass to clear_changes.
+        """
+        self.last_key = key
+        if key not in self.changes:
+            self.changes[key] = {name: self.generation for name in self.names or ()}
+            return None, self.generation
+        return set(self.changes[key]), self.generation
+
+    def clear_changes(self, key, names, generation):
+        """Marks the assets as exported, unless they changed again after `generation`"""
+        changes = self.changes.get(key)
+        if changes is None:
+            return
+        for name in names:
+            if changes.get(name, generation + 1) <= generation:
+                del changes[name]
+
+    def counts(self):
+        """Return the number of exportable objects and of those changed since the last export, None if unknown"""
+        if self.names is None:
+            return None, None
+        changes = self.changes.get(self.last_key)
+        if changes is None:
+            return len(self.names), None
+        return len(self.names), sum(1 for name in changes if name in self.names)
+
+
+export_index = ExportIndex()
+
+
+@contextmanager
+def suspend_tracking():
+    """Ignores the updates caused by the export itself, enter it before the state of the scene is changed"""
+    export_index.suspended = True
+    try:
+        yield
+    finally:
+        # Evaluate the updates tagged by the export while they are still ignored
+        try:
+            bpy.context.view_layer.update()
+        finally:
+            export_index.suspended = False
+
+
+@persistent
+def on_depsgraph_update(scene, depsgraph):
+    if export_index.suspended:
+        return
+    for update in depsgraph.updates:
+        id_data = update.id.original
+        if isinstance(id_data, bpy.types.Object):
+            # Temporary objects of an export are never assets
+            if temp_suffix in id_data.name:
+                continue
+            # Selection and other updates that do not change the exported data are not changes
+            changed = update.is_updated_geometry or update.is_updated_transform
+            export_index.object_updated(id_data, changed)
+        elif isinstance(id_data, bpy.types.Collection):
+            export_index.names = None
+        elif isinstance(id_data, bpy.types.Material):
+            # Material names are written in the exported files
+            export_index.changes.clear()
+
+
+@persistent
+def on_file_changed(*_args):
+    export_index.reset()
+
+
+handlers = [
+    (bpy.app.handlers.depsgraph_update_post, on_depsgraph_update),
+    (bpy.app.handlers.load_post, on_file_changed),
+    (bpy.app.handlers.undo_post, on_file_changed),
+    (bpy.app.handlers.redo_post, on_file_changed),
+]
+
+
+def register_handlers():
+    for handler_list, handler in handlers:
+        if handler not in handler_list:
+            handler_list.append(handler)
+
+
+def unregister_handlers():
+    for handler_list, handler in handlers:
+        if handler in handler_list:
+            handler_list.remove(handler)
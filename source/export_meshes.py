@@ -1,22 +1,77 @@
+import json
 import time
+import traceback
+from contextlib import ExitStack, contextmanager
+from fnmatch import fnmatchcase
 from pathlib import Path
 
 import bpy
+from bpy.app.handlers import persistent
 
-from .utils import run_in_object_mode, combine_children, relevant_objects, FT_VertexAnimation, \
-    get_or_create_export_collection
+from .utils import run_in_object_mode, combine_children, FT_VertexAnimation, \
+    get_or_create_export_collection, temp_suffix, deselect_all, object_mode_session
 
-from .vertex_animation import export_vertex_animation, remove_debug_meshes
+from .background_tasks import background_session, staged_file, wait_background_tasks
+from .batch_export import estimate_vertex_count, iter_parallel_export, worker_poll_interval
+from .export_index import export_index, suspend_tracking
+from .fbx_writer import mesh_smooth_type, write_fbx
+from .export_scheduler import ExportSchedule, schedule_log_name
+from .geometry_cache import discard_evaluated_geometry, geometry_session, release_evaluated_geometry
+from .manifest import ExportManifest, compute_fingerprint
+from .profiling import profile_asset, profile_export, profile_log_name, stage
+from .vertex_animation import (
+    bake_vertex_animation,
+    export_vertex_animation,
+    get_vertex_texture_paths,
+    remove_debug_meshes,
+    remove_export_mesh_object,
+)
+from .vertex_atlas import write_vertex_animation_atlas
+from .vertex_clips import get_vertex_clips
+
+# Options passed to bpy.ops.export_scene.fbx for every asset
+fbx_export_options = dict(
+    use_selection=True,
+    object_types={"MESH"},
+    apply_scale_options="FBX_SCALE_ALL",
+    bake_space_transform=True,
+    axis_forward="X",
+    axis_up="Y",
+    mesh_smooth_type=mesh_smooth_type,
+)
+
+
+class ExportProgress:
+    """Progress of an export, yielded by iter_export_assets before each step"""
+
+    def __init__(self, done, total, name, waiting=False):
+        self.done = done
+        self.total = total
+        # Name of the asset or the step about to run
+        self.name = name
+        # True while waiting for parallel workers, there is nothing to do until they finish
+        self.waiting = waiting
 
 
 class ExportAssets(bpy.types.Operator):
+    """Export the assets, Blender stays responsive and Esc cancels the export"""
+
     bl_idname = "object.export_assets"
     bl_label = "Export Assets"
     bl_options = {"REGISTER"}
 
+    # Seconds spent exporting at each timer event before giving control back to the interface
+    time_slice = 0.1
+
+    running = False
+    # Generator of the running modal export, closed by the handlers when the file changes under it
+    active_steps = None
+    # Set by an undo or a redo during the export, the objects held by the export are no longer valid
+    interrupted = False
+
     @classmethod
     def poll(cls, context):
-        return True
+        return not cls.running
 
     def execute(self, context):
         start = time.time()
@@ -25,61 +80,553 @@ class ExportAssets(bpy.types.Operator):
         bpy.context.workspace.status_text_set_internal("Exporting assets...")
         export_path = Path(bpy.path.abspath(props.export_path))
 
-        remove_debug_meshes(context)
+        status, _failed = export_assets(context, export_path, self.report)
+
+        elapsed = time.time() - start
+        bpy.context.workspace.status_text_set_internal(f"{status} in {elapsed:.2f} seconds.")
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        props = context.scene.asset_settings
+        export_path = Path(bpy.path.abspath(props.export_path))
+
+        self.start = time.time()
+        self.steps = iter_export_assets(context, export_path, self.report)
+        self.set_running(True, self.steps)
+
+        window_manager = context.window_manager
+        self.timer = window_manager.event_timer_add(0.01, window=context.window)
+        window_manager.modal_handler_add(self)
+        window_manager.progress_begin(0, 100)
+        context.workspace.status_text_set_internal("Exporting assets...")
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        if self.interrupted:
+            try:
+                close_steps(self.steps)
+            finally:
+                self.finish(context, "Export aborted")
+            self.report({"ERROR"}, "Export aborted: the file was changed by an undo")
+            return {"CANCELLED"}
+
+        if event.type == "ESC" and event.value == "PRESS":
+            try:
+                close_steps(self.steps)
+            finally:
+                self.finish(context, "Export cancelled")
+            self.report({"WARNING"}, "Export cancelled")
+            return {"CANCELLED"}
+
+        if event.type != "TIMER":
+            # Edits would invalidate the objects, the selection and the evaluated geometry held by the export
+            if event.type in navigation_events:
+                return {"PASS_THROUGH"}
+            return {"RUNNING_MODAL"}
+
+        deadline = time.perf_counter() + self.time_slice
+        try:
+            while time.perf_counter() < deadline:
+                progress = next(self.steps)
+                if progress.waiting:
+                    break
+        except StopIteration as result:
+            status, _failed = result.value
+            self.finish(context, f"{status} in {time.time() - self.start:.2f} seconds.")
+            return {"FINISHED"}
+        except Exception as error:
+            traceback.print_exc()
+            self.finish(context, "Export failed")
+            self.report({"ERROR"}, f"Export failed: {error}")
+            return {"CANCELLED"}
+
+        self.show_progress(context, progress)
+        return {"RUNNING_MODAL"}
+
+    def show_progress(self, context, progress: ExportProgress):
+        fraction = progress.done / progress.total if progress.total else 0
+        context.window_manager.progress_update(fraction * 100)
+
+        text = f"Exporting '{progress.name}' ({progress.done}/{progress.total})"
+        if progress.done:
+            eta = (time.time() - self.start) / progress.done * (progress.total - progress.done)
+            text = f"{text}, {eta:.0f} seconds left"
+        context.workspace.status_text_set_internal(f"{text} - Esc to cancel")
+
+    def finish(self, context, status):
+        window_manager = context.window_manager
+        window_manager.event_timer_remove(self.timer)
+        window_manager.progress_end()
+        context.workspace.status_text_set_internal(status)
+        self.set_running(False)
+
+    @classmethod
+    def set_running(cls, running, steps=None):
+        cls.running = running
+        cls.active_steps = steps
+        cls.interrupted = False
+
+
+# Events passed to the interface during a modal export, everything else is blocked until it finishes
+navigation_events = {
+    "MIDDLEMOUSE",
+    "WHEELUPMOUSE",
+    "WHEELDOWNMOUSE",
+    "MOUSEMOVE",
+    "INBETWEEN_MOUSEMOVE",
+    "TRACKPADPAN",
+    "TRACKPADZOOM",
+    "MOUSEROTATE",
+    "MOUSESMARTZOOM",
+    "NDOF_MOTION",
+    "WINDOW_DEACTIVATE",
+}
+
+
+def close_steps(steps):
+    """Closes an export generator whose objects may have been removed, the cleanup errors are only printed"""
+    try:
+        steps.close()
+    except Exception:
+        traceback.print_exc()
+
+
+@persistent
+def on_undo(*_args):
+    if ExportAssets.running:
+        ExportAssets.interrupted = True
+
+
+@persistent
+def on_load_pre(*_args):
+    """Loading a file removes the modal handler of a running export, which would stay running forever"""
+    if ExportAssets.active_steps is not None:
+        close_steps(ExportAssets.active_steps)
+    ExportAssets.set_running(False)
+
+
+export_handlers = [
+    (bpy.app.handlers.undo_post, on_undo),
+    (bpy.app.handlers.redo_post, on_undo),
+    (bpy.app.handlers.load_pre, on_load_pre),
+]
+
+
+def register_export_handlers():
+    for handler_list, handler in export_handlers:
+        if handler not in handler_list:
+            handler_list.append(handler)
+
+
+def unregister_export_handlers():
+    for handler_list, handler in export_handlers:
+        if handler in handler_list:
+            handler_list.remove(handler)
+
+
+def export_assets(context, export_path: Path, report, name_filter=None, jobs=None):
+    """
+    Exports the assets of the Export collection, without any UI-only call.
+    `report` has the same signature as Operator.report, `name_filter` is an optional fnmatch pattern
+    and `jobs` overrides the number of parallel jobs of the scene.
+    Returns the status text and the number of failed assets.
+    """
+
+    steps = iter_export_assets(context, export_path, report, name_filter, jobs)
+    while True:
+        try:
+            progress = next(steps)
+        except StopIteration as result:
+            return result.value
+        if progress.waiting:
+            time.sleep(worker_poll_interval)
+
+
+def iter_export_assets(context, export_path: Path, report, name_filter=None, jobs=None):
+    """
+    Generator version of export_assets, yields an ExportProgress before each step and returns its result.
+    Closing the generator cancels the export between two steps, the scene is restored by the context managers.
+    """
+
+    props = context.scene.asset_settings
+    jobs = jobs or props.parallel_jobs
+
+    remove_debug_meshes(context)
+
+    with (
+        profile_export(enabled=props.enable_profiling) as profiler,
+        geometry_session(props.geometry_cache_budget),
+        background_session(enabled=props.pipelined_writes, budget_mb=props.writer_queue_budget),
+        suspend_tracking(),
+        object_mode_session(),
+    ):
+        manifest = ExportManifest(export_path) if props.incremental_export else None
+        with stage("collection_scan"):
+            all_meshes = list_meshes()
+            meshes = all_meshes
+            if name_filter:
+                meshes = [mesh_object for mesh_object in meshes if fnmatchcase(mesh_object.name, name_filter)]
+
+        # Collect the assets that need to be exported, `checked` also lists the assets outside the filter
+        # that are written with them
+        to_export = []
+        checked = list(meshes)
+        fingerprints = {}
+        settings = dict(
+            fbx_export_options,
+            native_writer=props.use_native_writer,
+            vertex_animation_encoding=props.vertex_animation_encoding,
+            vertex_animation_pack_normals=props.vertex_animation_pack_normals,
+            vertex_animation_reduce=props.vertex_animation_reduce,
+            vertex_animation_tolerance=props.vertex_animation_tolerance,
+            vertex_animation_max_width=props.vertex_animation_max_width,
+            vertex_animation_power_of_two=props.vertex_animation_power_of_two,
+            vertex_animation_atlas=props.vertex_animation_atlas,
+            # Both writers scale the file from the units of the scene
+            unit_system=context.scene.unit_settings.system,
+            unit_scale_length=context.scene.unit_settings.scale_length,
+        )
+        if manifest:
+            # Assets unchanged since the last export with the same key keep the fingerprint of the manifest
+            changes_key = get_changes_key(context.scene, export_path, settings)
+            changed, generation = export_index.get_changes(changes_key)
+
+        with run_in_object_mode(enabled=manifest is not None):
+            for i, mesh_object in enumerate(meshes):
+                if manifest:
+                    fingerprint = None
+                    if changed is not None and mesh_object.name not in changed:
+                        fingerprint = manifest.get_fingerprint(mesh_object.name)
+                    if fingerprint is None:
+                        yield ExportProgress(i, len(meshes), f"Checking {mesh_object.name}")
+                        with stage("fingerprint"):
+                            fingerprint = compute_fingerprint(context, mesh_object, settings)
+                    fingerprints[mesh_object.name] = fingerprint
+                    if manifest.is_up_to_date(mesh_object.name, fingerprint):
+                        continue
+                to_export.append(mesh_object)
+
+        # Batches are exported as a whole as soon as one of their assets has changed,
+        # with all their assets even when the export is filtered
+        groups = {}
+        if props.batch_small_assets and jobs <= 1:
+            groups = get_batch_groups(all_meshes, props.batch_vertex_threshold)
+            asset_names = {mesh_object.name for mesh_object in all_meshes}
+            for name in [name for name in groups if name in asset_names]:
+                # The group file would overwrite the file of the asset, its assets are exported individually
+                report({"WARNING"}, f"Batch '{name}' has the name of an asset, its meshes are not batched")
+                del groups[name]
+            groups = {name: group for name, group in groups.items() if any(it in to_export for it in group)}
+            batched = {mesh_object for group in groups.values() for mesh_object in group}
+            to_export = [mesh_object for mesh_object in to_export if mesh_object not in batched]
+            checked.extend(it for it in batched if it not in checked)
+            if manifest:
+                yield from iter_missing_fingerprints(context, batched, fingerprints, settings)
+
+        # The atlas is rewritten as a whole as soon as one of its assets has changed,
+        # with every vertex animated asset even when the export is filtered
+        atlas_assets = []
+        if FT_VertexAnimation and props.vertex_animation_atlas:
+            atlas_assets = [it for it in all_meshes if it.export_properties.vertex_animation]
+            if any(mesh_object in to_export for mesh_object in atlas_assets):
+                to_export = [mesh_object for mesh_object in to_export if mesh_object not in atlas_assets]
+                checked.extend(it for it in atlas_assets if it not in checked)
+                if manifest:
+                    yield from iter_missing_fingerprints(context, atlas_assets, fingerprints, settings)
+            else:
+                atlas_assets = []
+
+        batched_count = sum(len(group) for group in groups.values())
+        exported_objects = {*to_export, *atlas_assets, *(it for group in groups.values() for it in group)}
+        skipped = sum(1 for mesh_object in checked if mesh_object not in exported_objects)
+        total = len(to_export) + batched_count + len(atlas_assets)
+
+        with stage("schedule"):
+            schedule = ExportSchedule(context, to_export, props.export_memory_budget)
 
         count = 0
-        for mesh_object in list_meshes():
-            file_output = export_path / f"{mesh_object.name}.fbx"
-            self.report({"INFO"}, f"Exporting mesh: '{mesh_object.name}' to '{file_output}'")
-            count = count + 1
+        failed = 0
+        failed_names = set()
+        if jobs > 1 and len(to_export) > 1:
+            report({"INFO"}, f"Exporting {len(to_export)} meshes with {jobs} workers")
+            if profiler:
+                # The workers run in other processes, only their total time is in export_schedule.json
+                profiler.parallel_assets = len(to_export)
+                report({"WARNING"}, "Profiling does not cover the assets exported by parallel workers")
+            # The heavy assets share a worker so that they are never exported at the same time
+            held_back = schedule.get_heavy(to_export, jobs)
+            if held_back:
+                report({"INFO"}, f"Holding back {len(held_back)} heavy meshes to a single worker")
+            for item in iter_parallel_export(to_export, export_path, jobs, schedule.weights(), held_back):
+                if item is None:
+                    yield ExportProgress(count + failed, total, f"{jobs} workers", waiting=True)
+                    continue
 
-            props = mesh_object.export_properties
+                name, result = item
+                schedule.record(name, result.get("time"))
+                if result["ok"]:
+                    count = count + 1
+                    if manifest:
+                        manifest.update(name, fingerprints[name], result["files"])
+                else:
+                    failed = failed + 1
+                    failed_names.add(name)
+                    report({"ERROR"}, f"Failed to export '{name}': {result['error']}")
+        else:
+            for mesh_object in to_export:
+                if schedule.must_wait(mesh_object.name):
+                    # Let the pending writes finish and free the cache before a heavy asset
+                    yield ExportProgress(count, total, f"Waiting for memory before {mesh_object.name}")
+                    with stage("memory_wait"):
+                        wait_background_tasks()
+                        release_evaluated_geometry()
 
-            with run_in_object_mode():
-                temp_object = None
+                yield ExportProgress(count, total, mesh_object.name)
+                file_output = export_path / f"{mesh_object.name}.fbx"
+                report({"INFO"}, f"Exporting mesh: '{mesh_object.name}' to '{file_output}'")
+                count = count + 1
 
-                # Rename the mesh object temporarily to avoid conflicts
-                original_name = mesh_object.name
-                original_object = mesh_object
-                mesh_object.name = f"{original_name}__temp__"
+                profile_path = None
+                if profiler and mesh_object.name == props.profile_asset:
+                    profile_path = export_path / f"{mesh_object.name}.prof"
 
-                try:
-                    # bpy.context.scene.frame_current = 0
+                start = time.perf_counter()
+                with profile_asset(mesh_object.name, profile_path):
+                    with run_in_object_mode(enabled=needs_object_mode(context, mesh_object)):
+                        files = export_asset(context, mesh_object, file_output, export_path, report)
+                schedule.record(mesh_object.name, time.perf_counter() - start)
 
-                    if props.combine_child:
-                        mesh_object = temp_object = combine_children(original_name, mesh_object)
+                if manifest:
+                    manifest.update(mesh_object.name, fingerprints[mesh_object.name], files)
 
-                    if FT_VertexAnimation and props.vertex_animation:
-                        # Experimental feature
-                        mesh_object = export_vertex_animation(context, mesh_object, export_path)
+            for name, group in groups.items():
+                yield ExportProgress(count, total, name)
+                file_output = export_path / f"{name}.fbx"
+                report({"INFO"}, f"Exporting {len(group)} meshes to '{file_output}'")
+                count = count + len(group)
 
-                    bpy.ops.object.select_all(action="DESELECT")
-                    mesh_object.select_set(True)
+                with profile_asset(name):
+                    with run_in_object_mode(enabled=any(needs_object_mode(context, it) for it in group)):
+                        export_asset_batch(context, group, file_output, export_path)
 
-                    bpy.ops.export_scene.fbx(
-                        filepath=str(file_output),
-                        use_selection=True,
-                        object_types={"MESH"},
-                        apply_scale_options="FBX_SCALE_ALL",
-                        bake_space_transform=True,
-                        axis_forward="X",
-                        axis_up="Y",
-                    )
+                if manifest:
+                    for mesh_object in group:
+                        manifest.update(mesh_object.name, fingerprints[mesh_object.name], [file_output])
 
-                finally:
-                    if temp_object:
-                        bpy.data.objects.remove(temp_object, do_unlink=True)
-                    original_object.name = original_name
+        if atlas_assets:
+            yield ExportProgress(count, total, props.vertex_animation_atlas_name)
+            report({"INFO"}, f"Exporting {len(atlas_assets)} vertex animated meshes with a shared atlas")
+            count = count + len(atlas_assets)
 
-        elapsed = time.time() - start
-        bpy.context.workspace.status_text_set_internal(f"Exported {count} meshes in {elapsed:.2f} seconds.")
-        return {"FINISHED"}
+            with profile_asset(props.vertex_animation_atlas_name):
+                with run_in_object_mode():
+                    export_atlas_assets(context, atlas_assets, export_path, report)
+
+            if manifest:
+                atlas_files = get_vertex_texture_paths(context, export_path, props.vertex_animation_atlas_name)
+                for mesh_object in atlas_assets:
+                    files = [export_path / f"{mesh_object.name}.fbx", *atlas_files]
+                    manifest.update(mesh_object.name, fingerprints[mesh_object.name], files)
+
+        # The manifest must not list files that are still being written
+        yield ExportProgress(count, total, "Writing files")
+        wait_background_tasks()
+
+        status = f"Exported {count} meshes"
+        if manifest:
+            stale = manifest.remove_stale({mesh_object.name for mesh_object in all_meshes})
+            for file in manifest.remove_replaced_files():
+                report({"INFO"}, f"Removed replaced file: '{file}'")
+            manifest.save()
+            for name in stale:
+                report({"INFO"}, f"Stale asset: '{name}' is no longer exported")
+            status = f"Exported {count} meshes, skipped {skipped}, {len(stale)} stale"
+            exported = [mesh_object.name for mesh_object in checked if mesh_object.name not in failed_names]
+            export_index.clear_changes(changes_key, exported, generation)
+        if failed:
+            status = f"{status}, {failed} failed"
+
+        if profiler:
+            profiler.write(export_path / profile_log_name)
+            if schedule.timings:
+                schedule.write(export_path / schedule_log_name)
+
+    return status, failed
+
+
+def export_asset(context, mesh_object, file_output, export_path, report=None):
+    """
+    Exports a single asset to `file_output`, must be called in object mode unless the native writer is used.
+    Returns the written files, with the vertex animation texture and its description.
+    """
+    native = context.scene.asset_settings.use_native_writer
+    name = mesh_object.name
+    with prepare_asset(context, mesh_object, export_path, rename_original=not native, report=report) as export_object:
+        write_asset_fbx(context, [(name, export_object)], file_output)
+
+    files = [file_output]
+    if FT_VertexAnimation and mesh_object.export_properties.vertex_animation:
+        files.extend(get_vertex_texture_paths(context, export_path, name))
+    return files
+
+
+def export_asset_batch(context, mesh_objects, file_output, export_path):
+    """Exports several assets as named objects of a single FBX file, see export_asset."""
+    native = context.scene.asset_settings.use_native_writer
+    with ExitStack() as stack:
+        export_objects = []
+        for mesh_object in mesh_objects:
+            name = mesh_object.name
+            rename_original = not native and mesh_object.export_properties.combine_child
+            export_object = stack.enter_context(prepare_asset(context, mesh_object, export_path, rename_original))
+            export_objects.append((name, export_object))
+
+        write_asset_fbx(context, export_objects, file_output)
+
+
+def export_atlas_assets(context, mesh_objects, export_path, report=None):
+    """
+    Exports vertex animated assets sharing a single atlas texture, see export_asset.
+    Returns the path of the atlas texture.
+    """
+    settings = context.scene.asset_settings
+    native = settings.use_native_writer
+    bakes = []
+    with ExitStack() as stack:
+        export_objects = []
+        for mesh_object in mesh_objects:
+            name = mesh_object.name
+            export_object = stack.enter_context(
+                prepare_asset(context, mesh_object, export_path, rename_original=not native, bakes=bakes)
+            )
+            export_objects.append((name, export_object))
+
+        atlas_path = write_vertex_animation_atlas(
+            context,
+            bakes,
+            export_path,
+            settings.vertex_animation_atlas_name,
+            settings.vertex_animation_atlas_width,
+            report,
+        )
+
+        for name, export_object in export_objects:
+            write_asset_fbx(context, [(name, export_object)], export_path / f"{name}.fbx")
+
+    return atlas_path
+
+
+def write_asset_fbx(context, export_objects, file_output):
+    """Writes the objects [(name, object)] to a FBX file, with the native writer or the FBX operator"""
+    with stage("fbx_write"):
+        if context.scene.asset_settings.use_native_writer:
+            write_fbx(context, export_objects, file_output)
+            return
+
+        deselect_all()
+        for _name, export_object in export_objects:
+            export_object.select_set(True)
+
+        with staged_file(file_output) as staging_path:
+            bpy.ops.export_scene.fbx(filepath=str(staging_path), **fbx_export_options)
+
+
+def needs_object_mode(context, mesh_object):
+    """The native writer does not use the selection, only the vertex animation needs object mode"""
+    if not context.scene.asset_settings.use_native_writer:
+        return True
+    return FT_VertexAnimation and mesh_object.export_properties.vertex_animation
+
+
+@contextmanager
+def prepare_asset(context, mesh_object, export_path, rename_original=True, bakes=None, report=None):
+    """
+    Yields the object to export for an asset, removing any temporary object on exit.
+    With `rename_original` the original object is renamed temporarily and the combined mesh takes its name.
+    If `bakes` is a list, the vertex animation is appended to it instead of being written.
+    """
+    props = mesh_object.export_properties
+    temp_object = None
+    vertex_animation_object = None
+
+    # Rename the mesh object temporarily to avoid conflicts
+    original_name = mesh_object.name
+    original_object = mesh_object
+    combined_name = original_name if rename_original else f"{original_name}{temp_suffix}"
+    if rename_original:
+        mesh_object.name = f"{original_name}{temp_suffix}"
+
+    try:
+        # bpy.context.scene.frame_current = 0
+
+        if props.combine_child:
+            with stage("combine"):
+                mesh_object = temp_object = combine_children(combined_name, mesh_object)
+
+        if FT_VertexAnimation and props.vertex_animation:
+            # Experimental feature
+            # The clips are declared on the original object
+            clips = get_vertex_clips(context, original_object)
+            if bakes is None:
+                mesh_object = export_vertex_animation(context, mesh_object, export_path, clips, original_name, report)
+            else:
+                bake = bake_vertex_animation(context, mesh_object, original_name, clips)
+                bakes.append(bake)
+                mesh_object = bake.export_object
+            vertex_animation_object = mesh_object
+
+        yield mesh_object
+
+    finally:
+        if vertex_animation_object:
+            discard_evaluated_geometry(vertex_animation_object)
+            remove_export_mesh_object(vertex_animation_object)
+        if temp_object:
+            discard_evaluated_geometry(temp_object)
+            bpy.data.objects.remove(temp_object, do_unlink=True)
+        original_object.name = original_name
+
+
+def iter_missing_fingerprints(context, meshes, fingerprints, settings):
+    """Computes the fingerprints of the assets that were not checked yet, yields an ExportProgress for each"""
+    missing = [mesh_object for mesh_object in meshes if mesh_object.name not in fingerprints]
+    with run_in_object_mode():
+        for i, mesh_object in enumerate(missing):
+            yield ExportProgress(i, len(missing), f"Checking {mesh_object.name}")
+            with stage("fingerprint"):
+                fingerprints[mesh_object.name] = compute_fingerprint(context, mesh_object, settings)
+
+
+def get_batch_groups(meshes, vertex_threshold):
+    """
+    Groups the assets below the vertex threshold by the child collection of the Export collection they belong to.
+    Returns a dictionary {name: [assets]}, assets left out are exported individually.
+    """
+
+    collection = get_or_create_export_collection()
+    groups = {}
+    for mesh_object in meshes:
+        props = mesh_object.export_properties
+        if (FT_VertexAnimation and props.vertex_animation) or estimate_vertex_count(mesh_object) > vertex_threshold:
+            continue
+
+        group = collection.name
+        for child in collection.children:
+            if mesh_object.name in child.all_objects:
+                group = child.name
+                break
+        groups.setdefault(group, []).append(mesh_object)
+
+    # A group with a single asset is exported as usual
+    return {name: group for name, group in groups.items() if len(group) > 1}
 
 
 def list_meshes():
     """List all meshes in the current Blender scene."""
-    collection = get_or_create_export_collection()
-    all_objects = list(collection.objects)
-    all_objects.extend([obj for it in collection.children_recursive for obj in it.objects])
-    meshes = [obj for obj in all_objects if obj.type in relevant_objects and obj.export_properties.enable_export]
-    return sorted(meshes, key=lambda x: x.name.lower())
+    return export_index.get_meshes()
+
+
+def get_changes_key(scene, export_path, settings):
+    """Exports with the same key produce the same files for unchanged assets"""
+    frames = (scene.frame_start, scene.frame_end, scene.frame_step, scene.render.fps)
+    return str(export_path), json.dumps(settings, sort_keys=True, default=sorted), frames
@@ -0,0 +1,112 @@
+import json
+import time
+from pathlib import Path
+
+from .background_tasks import get_pending_bytes, write_atomic
+from .batch_export import estimate_vertex_count
+from .geometry_cache import get_cached_bytes
+from .utils import FT_VertexAnimation, get_with_children
+from .vertex_clips import get_vertex_clips
+
+schedule_log_name = "export_schedule.json"
+
+# Cost of combining one child, in vertices
+child_cost = 2000
+# Memory of an evaluated vertex: positions, normals, corners and the copies made by the writers
+bytes_per_vertex = 256
+# Memory of a sampled vertex per frame: the float32 position and normal pixels of the texture
+bytes_per_vertex_frame = 32
+
+
+class AssetEstimate:
+    """Estimated cost and memory of an asset, computed without evaluating it"""
+
+    def __init__(self, vertices, children, frames):
+        self.vertices = vertices
+        self.children = children
+        # Sampled frames of the vertex animation, 0 for static assets
+        self.frames = frames
+
+    @property
+    def cost(self):
+        return self.vertices * (1 + self.frames) + self.children * child_cost
+
+    @property
+    def memory(self):
+        return self.vertices * (bytes_per_vertex + self.frames * bytes_per_vertex_frame)
+
+
+def estimate_asset(context, mesh_object):
+    props = mesh_object.export_properties
+    children = len(get_with_children(mesh_object)) - 1 if props.combine_child else 0
+    frames = 0
+    if FT_VertexAnimation and props.vertex_animation:
+        try:
+            frames = sum(len(clip.frames) for clip in get_vertex_clips(context, mesh_object))
+        except ValueError:
+            # Reported when the asset is exported
+            frames = 0
+    return AssetEstimate(estimate_vertex_count(mesh_object), children, frames)
+
+
+class ExportSchedule:
+    """
+    Orders the assets of an export from their estimated cost and holds back the heavy ones when the memory budget
+    would be exceeded. The estimates are logged next to the actual timings to tune the cost model.
+    """
+
+    def __init__(self, context, meshes, budget_mb=0):
+        self.estimates = {mesh_object.name: estimate_asset(context, mesh_object) for mesh_object in meshes}
+        # 0 disables the memory budget
+        self.budget = budget_mb * 1024 * 1024
+        self.timings = {}
+        self.held_back = set()
+
+    def weights(self):
+        """Cost of each asset, the parallel workers export them from the most expensive"""
+        return {name: estimate.cost for name, estimate in self.estimates.items()}
+
+    def get_heavy(self, meshes, jobs):
+        """Return the names of the assets that do not fit in the share of the memory budget of one job"""
+        if not self.budget:
+            return set()
+        heavy = {it.name for it in meshes if self.estimates[it.name].memory > self.budget / jobs}
+        self.held_back.update(heavy)
+        return heavy
+
+    def must_wait(self, name):
+        """Return True if the pending writes and the cached geometry must be released before exporting the asset"""
+        if not self.budget:
+            return False
+        in_use = get_pending_bytes() + get_cached_bytes()
+        if in_use == 0 or in_use + self.estimates[name].memory <= self.budget:
+            return False
+        self.held_back.add(name)
+        return True
+
+    def record(self, name, seconds):
+        self.timings[name] = seconds
+
+    def summary(self):
+        """Return the measured seconds per unit of cost and the estimates of each asset with its timing"""
+        timed = [name for name, seconds in self.timings.items() if seconds is not None and self.estimates[name].cost]
+        total_cost = sum(self.estimates[name].cost for name in timed)
+        seconds_per_cost = sum(self.timings[name] for name in timed) / total_cost if total_cost else None
+        assets = {}
+        for name, estimate in self.estimates.items():
+            assets[name] = {
+                "vertices": estimate.vertices,
+                "children": estimate.children,
+                "frames": estimate.frames,
+                "cost": estimate.cost,
+                "memory": estimate.memory,
+                "held_back": name in self.held_back,
+                "time": self.timings.get(name),
+            }
+            if seconds_per_cost is not None:
+                assets[name]["estimated_time"] = estimate.cost * seconds_per_cost
+        return {"seconds_per_cost": seconds_per_cost, "budget": self.budget, "assets": assets}
+
+    def write(self, path: Path):
+        data = json.dumps({"created": time.time(), **self.summary()}, indent=2)
+        write_atomic(path, data.encode("utf-8"))
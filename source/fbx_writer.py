@@ -0,0 +1,487 @@
+"""
+Minimal binary FBX 7.4 writer for static meshes.
+
+It reads the evaluated meshes with foreach_get and never touches the selection or the object names.
+Only `collect_fbx_mesh` needs Blender data, `encode_fbx` works on plain arrays and can run in a background thread.
+"""
+
+import struct
+import zlib
+from pathlib import Path
+
+import numpy as np
+from bpy_extras.io_utils import axis_conversion
+
+from .background_tasks import run_in_background, write_atomic
+from .geometry_cache import get_evaluated_geometry
+
+fbx_version = 7400
+creator = "Blender Asset Exporter"
+
+# Same convention as bpy.ops.export_scene.fbx(axis_forward="X", axis_up="Y", bake_space_transform=True)
+axis_forward = "X"
+axis_up = "Y"
+# (axis, sign) of up, front and coord axes for Y up, X forward
+fbx_axes = ((1, 1), (0, -1), (2, 1))
+# Same as bpy.ops.export_scene.fbx(mesh_smooth_type=...)
+# "OFF" writes the normals only, "FACE" and "EDGE" also write a smoothing layer
+mesh_smooth_type = "OFF"
+
+_header_magic = b"Kaydara FBX Binary\x20\x20\x00\x1a\x00"
+_block_sentinel = b"\x00" * 13
+_foot_id = b"\xfa\xbc\xab\x09\xd0\xc8\xd4\x66\xb1\x76\xfb\x83\x1c\xf7\x26\x7e"
+_file_id = b"\x28\xb3\x2a\xeb\xb6\x24\xcc\xc2\xbf\xc8\xb0\x2a\xa9\x2b\xfc\xf1"
+_time_id = "1970-01-01 10:00:00:000"
+_foot_magic = b"\xf8\x5a\x8c\x6a\xde\xf5\xd9\x7e\xec\xe9\x0c\xe3\x75\x8f\x29\x0b"
+
+# Arrays smaller than this are not worth compressing
+_compress_min_size = 128
+
+
+class FBXNode:
+    """A node of the FBX document, with typed properties and child nodes"""
+
+    def __init__(self, name: str):
+        self.name = name.encode()
+        self.props = []
+        self.children = []
+
+    def add_child(self, name, *values):
+        """Add a child node with values guessed from their python type"""
+        node = FBXNode(name)
+        for value in values:
+            if isinstance(value, bool):
+                node.add_bool(value)
+            elif isinstance(value, int):
+                node.add_int32(value)
+            elif isinstance(value, float):
+                node.add_float64(value)
+            elif isinstance(value, str):
+                node.add_string(value)
+            elif isinstance(value, bytes):
+                node.add_bytes(value)
+            else:
+                node.add_array(value)
+        self.children.append(node)
+        return node
+
+    def add_bool(self, value):
+        self.props.append(b"C" + struct.pack("<?", value))
+
+    def add_int32(self, value):
+        self.props.append(b"I" + struct.pack("<i", value))
+
+    def add_int64(self, value):
+        self.props.append(b"L" + struct.pack("<q", value))
+
+    def add_float64(self, value):
+        self.props.append(b"D" + struct.pack("<d", value))
+
+    def add_string(self, value: str):
+        data = value.encode()
+        self.props.append(b"S" + struct.pack("<I", len(data)) + data)
+
+    def add_bytes(self, value: bytes):
+        self.props.append(b"R" + struct.pack("<I", len(value)) + value)
+
+    def add_array(self, array):
+        array = np.ascontiguousarray(array)
+        if array.dtype == np.float64:
+            kind = b"d"
+        elif array.dtype == np.float32:
+            kind = b"f"
+        elif array.dtype == np.int64:
+            kind = b"l"
+        elif array.dtype == np.int32:
+            kind = b"i"
+        else:
+            raise TypeError(f"Unsupported array type: {array.dtype}")
+        data = array.astype(array.dtype.newbyteorder("<"), copy=False).tobytes()
+        encoding = 0
+        if len(data) >= _compress_min_size:
+            data = zlib.compress(data, 1)
+            encoding = 1
+        self.props.append(kind + struct.pack("<3I", array.size, encoding, len(data)) + data)
+
+    def encode(self, offset, is_last):
+        """Return the bytes of the node written at `offset`"""
+        props = b"".join(self.props)
+        header_size = 13 + len(self.name)
+        children = encode_children(self.children, offset + header_size + len(props))
+        if self.children:
+            children += _block_sentinel
+        elif not self.props and not is_last:
+            children = _block_sentinel
+        end_offset = offset + header_size + len(props) + len(children)
+        header = struct.pack("<3IB", end_offset, len(self.props), len(props), len(self.name))
+        return header + self.name + props + children
+
+
+def encode_children(children, offset):
+    chunks = []
+    for i, child in enumerate(children):
+        data = child.encode(offset, i == len(children) - 1)
+        chunks.append(data)
+        offset += len(data)
+    return b"".join(chunks)
+
+
+def add_properties70(node, properties):
+    """Add a Properties70 child, each property is a tuple (name, type, label, flags, *values)"""
+    p70 = node.add_child("Properties70")
+    for name, type_name, label, flags, *values in properties:
+        p = p70.add_child("P", name, type_name, label, flags)
+        for value in values:
+            if type_name in ("int", "enum", "bool", "Integer"):
+                p.add_int32(int(value))
+            elif isinstance(value, str):
+                p.add_string(value)
+            else:
+                p.add_float64(float(value))
+    return p70
+
+
+class FBXMesh:
+    """Arrays of a mesh object ready to be encoded, already converted in the FBX space"""
+
+    def __init__(
+        self,
+        name,
+        positions,
+        polygon_vertex_index,
+        edges,
+        smoothing,
+        normals,
+        uv_maps,
+        material_indices,
+        materials,
+        matrix,
+    ):
+        self.name = name
+        self.positions = positions
+        self.polygon_vertex_index = polygon_vertex_index
+        # Index in polygon_vertex_index of the first corner of each edge used by a polygon
+        self.edges = edges
+        # (mapping, smooth flags) of the smoothing layer, None without it
+        self.smoothing = smoothing
+        self.normals = normals
+        # [(name, per-loop uv)]
+        self.uv_maps = uv_maps
+        self.material_indices = material_indices
+        self.materials = materials
+        # (translation, rotation in degrees, scale)
+        self.matrix = matrix
+
+    @property
+    def nbytes(self):
+        arrays = [self.positions, self.polygon_vertex_index, self.edges, self.normals, self.material_indices]
+        if self.smoothing:
+            arrays.append(self.smoothing[1])
+        arrays.extend(uv for _name, uv in self.uv_maps)
+        return sum(array.nbytes for array in arrays)
+
+
+def get_global_matrix():
+    return axis_conversion(to_forward=axis_forward, to_up=axis_up).to_4x4()
+
+
+def collect_fbx_mesh(name, obj, depsgraph):
+    """
+    Read the evaluated mesh of an object, through the geometry cache, and convert it to the FBX space.
+    Must run in the main thread.
+    """
+
+    global_matrix = get_global_matrix()
+    rotation = np.array(global_matrix.to_3x3(), dtype=np.float64)
+
+    geometry = get_evaluated_geometry(obj, depsgraph, normals=True)
+    arrays = geometry.arrays
+    positions = arrays.positions
+    corner_verts = arrays.corner_verts
+    loop_starts = arrays.loop_starts
+    normals = geometry.corner_normals
+    uv_maps = [(uv_name, arrays.attributes[uv_name][2].astype(np.float64)) for uv_name in arrays.uv_maps]
+
+    material_indices = np.zeros(len(loop_starts), dtype=np.int32)
+    if len(geometry.materials) > 1 and "material_index" in arrays.attributes:
+        material_indices = arrays.attributes["material_index"][2].reshape(-1)
+    materials = [material or "Material" for material in geometry.materials]
+
+    # The last index of each polygon is stored as -(index + 1)
+    polygon_vertex_index = corner_verts.copy()
+    if len(loop_starts):
+        ends = np.append(loop_starts[1:], len(corner_verts)) - 1
+        polygon_vertex_index[ends] = ~polygon_vertex_index[ends]
+
+    # First corner of each edge, loose edges are not written, like the FBX operator
+    corner_edges = arrays.corner_edges
+    first_corners = np.full(len(arrays.edges), -1, dtype=np.int32)
+    first_corners[corner_edges[::-1]] = np.arange(len(corner_edges) - 1, -1, -1, dtype=np.int32)
+    used_edges = first_corners >= 0
+    edges = first_corners[used_edges]
+    smoothing = get_smoothing(arrays, used_edges)
+
+    # Like bake_space_transform, the geometry is moved in the FBX space and the object matrix is conjugated
+    matrix = global_matrix @ obj.matrix_world @ global_matrix.inverted()
+    translation, quaternion, scale = matrix.decompose()
+    rotation_degrees = [np.degrees(it) for it in quaternion.to_euler("XYZ")]
+
+    return FBXMesh(
+        name,
+        (positions.astype(np.float64) @ rotation.T),
+        polygon_vertex_index,
+        edges,
+        smoothing,
+        (normals.astype(np.float64) @ rotation.T),
+        uv_maps,
+        material_indices,
+        materials,
+        (tuple(translation), tuple(rotation_degrees), tuple(scale)),
+    )
+
+
+def get_smoothing(arrays, used_edges):
+    """Return the smoothing layer written for `mesh_smooth_type`, 1 is smooth, like the FBX operator"""
+    if mesh_smooth_type not in ("FACE", "EDGE"):
+        return None
+
+    def get_flags(name, size):
+        values = arrays.attributes.get(name)
+        return values[2].reshape(-1).astype(bool) if values else np.zeros(size, dtype=bool)
+
+    sharp_faces = get_flags("sharp_face", len(arrays.loop_starts))
+    if mesh_smooth_type == "FACE":
+        return "ByPolygon", (~sharp_faces).astype(np.int32)
+
+    # The edges of sharp faces are sharp
+    sharp_edges = get_flags("sharp_edge", len(arrays.edges))
+    face_sizes = np.diff(np.append(arrays.loop_starts, len(arrays.corner_verts)))
+    face_of_corner = np.repeat(np.arange(len(arrays.loop_starts)), face_sizes)
+    sharp_edges[arrays.corner_edges[sharp_faces[face_of_corner]]] = True
+    return "ByEdge", (~sharp_edges[used_edges]).astype(np.int32)
+
+
+def encode_fbx(meshes, unit_scale):
+    """Return the bytes of a binary FBX file containing the given meshes"""
+
+    root = []
+    uid = iter(range(1_000_000, 2**62))
+
+    header = FBXNode("FBXHeaderExtension")
+    header.add_child("FBXHeaderVersion", 1003)
+    header.add_child("FBXVersion", fbx_version)
+    header.add_child("EncryptionType", 0)
+    timestamp = header.add_child("CreationTimeStamp")
+    for name, value in [("Version", 1000), ("Year", 1970), ("Month", 1), ("Day", 1), ("Hour", 10)]:
+        timestamp.add_child(name, value)
+    for name in ["Minute", "Second", "Millisecond"]:
+        timestamp.add_child(name, 0)
+    header.add_child("Creator", creator)
+    root.append(header)
+
+    file_id = FBXNode("FileId")
+    file_id.add_bytes(_file_id)
+    root.append(file_id)
+    creation_time = FBXNode("CreationTime")
+    creation_time.add_string(_time_id)
+    root.append(creation_time)
+    creator_node = FBXNode("Creator")
+    creator_node.add_string(creator)
+    root.append(creator_node)
+
+    (up, up_sign), (front, front_sign), (coord, coord_sign) = fbx_axes
+    global_settings = FBXNode("GlobalSettings")
+    global_settings.add_child("Version", 1000)
+    add_properties70(
+        global_settings,
+        [
+            ("UpAxis", "int", "Integer", "", up),
+            ("UpAxisSign", "int", "Integer", "", up_sign),
+            ("FrontAxis", "int", "Integer", "", front),
+            ("FrontAxisSign", "int", "Integer", "", front_sign),
+            ("CoordAxis", "int", "Integer", "", coord),
+            ("CoordAxisSign", "int", "Integer", "", coord_sign),
+            ("OriginalUpAxis", "int", "Integer", "", 2),
+            ("OriginalUpAxisSign", "int", "Integer", "", 1),
+            ("UnitScaleFactor", "double", "Number", "", unit_scale),
+            ("OriginalUnitScaleFactor", "double", "Number", "", unit_scale),
+        ],
+    )
+    root.append(global_settings)
+
+    documents = FBXNode("Documents")
+    documents.add_child("Count", 1)
+    document = FBXNode("Document")
+    document.add_int64(next(uid))
+    document.add_string("Scene")
+    document.add_string("Scene")
+    add_properties70(document, [])
+    document_root = FBXNode("RootNode")
+    document_root.add_int64(0)
+    document.children.append(document_root)
+    documents.children.append(document)
+    root.append(documents)
+    root.append(FBXNode("References"))
+
+    objects = FBXNode("Objects")
+    connections = FBXNode("Connections")
+    material_uids = {}
+
+    def connect(child_uid, parent_uid):
+        connection = connections.add_child("C", "OO")
+        connection.add_int64(child_uid)
+        connection.add_int64(parent_uid)
+
+    for mesh in meshes:
+        geometry_uid = next(uid)
+        geometry = FBXNode("Geometry")
+        geometry.add_int64(geometry_uid)
+        geometry.add_string(f"{mesh.name}\x00\x01Geometry")
+        geometry.add_string("Mesh")
+        add_properties70(geometry, [])
+        geometry.add_child("GeometryVersion", 124)
+        geometry.add_child("Vertices", mesh.positions.reshape(-1))
+        geometry.add_child("PolygonVertexIndex", mesh.polygon_vertex_index)
+        geometry.add_child("Edges", mesh.edges)
+
+        layer_elements = [[("LayerElementNormal", 0)]]
+        normals = geometry.add_child("LayerElementNormal", 0)
+        normals.add_child("Version", 101)
+        normals.add_child("Name", "")
+        normals.add_child("MappingInformationType", "ByPolygonVertex")
+        normals.add_child("ReferenceInformationType", "Direct")
+        normals.add_child("Normals", mesh.normals.reshape(-1))
+
+        if mesh.smoothing:
+            mapping, flags = mesh.smoothing
+            smoothing = geometry.add_child("LayerElementSmoothing", 0)
+            smoothing.add_child("Version", 102)
+            smoothing.add_child("Name", "")
+            smoothing.add_child("MappingInformationType", mapping)
+            smoothing.add_child("ReferenceInformationType", "Direct")
+            smoothing.add_child("Smoothing", flags)
+            layer_elements[0].append(("LayerElementSmoothing", 0))
+
+        for i, (name, uv) in enumerate(mesh.uv_maps):
+            uv_node = geometry.add_child("LayerElementUV", i)
+            uv_node.add_child("Version", 101)
+            uv_node.add_child("Name", name)
+            uv_node.add_child("MappingInformationType", "ByPolygonVertex")
+            uv_node.add_child("ReferenceInformationType", "IndexToDirect")
+            uv_node.add_child("UV", uv.reshape(-1))
+            uv_node.add_child("UVIndex", np.arange(len(uv), dtype=np.int32))
+            # Each extra uv map lives in its own layer
+            if i == 0:
+                layer_elements[0].append(("LayerElementUV", 0))
+            else:
+                layer_elements.append([("LayerElementUV", i)])
+
+        if mesh.materials:
+            material_node = geometry.add_child("LayerElementMaterial", 0)
+            material_node.add_child("Version", 101)
+            material_node.add_child("Name", "")
+            material_node.add_child("MappingInformationType", "ByPolygon" if len(mesh.materials) > 1 else "AllSame")
+            material_node.add_child("ReferenceInformationType", "IndexToDirect")
+            indices = mesh.material_indices if len(mesh.materials) > 1 else np.zeros(1, dtype=np.int32)
+            material_node.add_child("Materials", indices)
+            layer_elements[0].append(("LayerElementMaterial", 0))
+
+        for i, elements in enumerate(layer_elements):
+            layer = geometry.add_child("Layer", i)
+            layer.add_child("Version", 100)
+            for element_type, typed_index in elements:
+                element = layer.add_child("LayerElement")
+                element.add_child("Type", element_type)
+                element.add_child("TypedIndex", typed_index)
+        objects.children.append(geometry)
+
+        model_uid = next(uid)
+        model = FBXNode("Model")
+        model.add_int64(model_uid)
+        model.add_string(f"{mesh.name}\x00\x01Model")
+        model.add_string("Mesh")
+        model.add_child("Version", 232)
+        translation, rotation, scale = mesh.matrix
+        add_properties70(
+            model,
+            [
+                ("Lcl Translation", "Lcl Translation", "", "A", *translation),
+                ("Lcl Rotation", "Lcl Rotation", "", "A", *rotation),
+                ("Lcl Scaling", "Lcl Scaling", "", "A", *scale),
+                ("DefaultAttributeIndex", "int", "Integer", "", 0),
+                ("InheritType", "enum", "", "", 1),
+            ],
+        )
+        model.add_child("MultiLayer", 0)
+        model.add_child("MultiTake", 0)
+        model.add_child("Shading", True)
+        model.add_child("Culling", "CullingOff")
+        objects.children.append(model)
+
+        connect(model_uid, 0)
+        connect(geometry_uid, model_uid)
+
+        for material_name in mesh.materials:
+            if material_name not in material_uids:
+                material_uids[material_name] = next(uid)
+                material = FBXNode("Material")
+                material.add_int64(material_uids[material_name])
+                material.add_string(f"{material_name}\x00\x01Material")
+                material.add_string("")
+                material.add_child("Version", 102)
+                material.add_child("ShadingModel", "Phong")
+                material.add_child("MultiLayer", 0)
+                add_properties70(material, [])
+                objects.children.append(material)
+            connect(material_uids[material_name], model_uid)
+
+    counts = [("GlobalSettings", 1), ("Geometry", len(meshes)), ("Model", len(meshes))]
+    if material_uids:
+        counts.append(("Material", len(material_uids)))
+    definitions = FBXNode("Definitions")
+    definitions.add_child("Version", 100)
+    definitions.add_child("Count", sum(count for _name, count in counts))
+    for name, count in counts:
+        object_type = definitions.add_child("ObjectType", name)
+        object_type.add_child("Count", count)
+    root.append(definitions)
+
+    root.append(objects)
+    root.append(connections)
+    takes = FBXNode("Takes")
+    takes.add_child("Current", "")
+    root.append(takes)
+
+    head = _header_magic + struct.pack("<I", fbx_version)
+    body = encode_children(root, len(head)) + _block_sentinel
+
+    # Footer, as written by the official SDK
+    foot = _foot_id + b"\x00" * 4
+    offset = len(head) + len(body) + len(foot)
+    padding = ((offset + 15) & ~15) - offset
+    foot += b"\x00" * (padding or 16)
+    foot += struct.pack("<I", fbx_version) + b"\x00" * 120 + _foot_magic
+    return head + body + foot
+
+
+def get_unit_scale(scene):
+    """FBX unit scale with apply_unit_scale and FBX_SCALE_ALL, scenes without unit system are not scaled"""
+    if scene.unit_settings.system == "NONE":
+        return 1.0
+    return 100.0 * scene.unit_settings.scale_length
+
+
+def write_fbx(context, objects, file_output: Path):
+    """
+    Writes the evaluated meshes of [(name, object)] to a binary FBX file.
+    Objects other than meshes are skipped, like the FBX operator does with object_types={"MESH"}.
+    The meshes are read immediately, the encoding and the write run in the background tasks of the export if any.
+    """
+    depsgraph = context.evaluated_depsgraph_get()
+    meshes = [collect_fbx_mesh(name, obj, depsgraph) for name, obj in objects if obj.type == "MESH"]
+    nbytes = sum(mesh.nbytes for mesh in meshes)
+    run_in_background(write_encoded_fbx, meshes, get_unit_scale(context.scene), file_output, nbytes=nbytes)
+
+
+def write_encoded_fbx(meshes, unit_scale, file_output: Path):
+    write_atomic(file_output, encode_fbx(meshes, unit_scale))
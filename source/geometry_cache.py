@@ -0,0 +1,165 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+from .mesh_arrays import read_mesh_arrays
+
+# Cache of the running export, None outside of an export session
+active_cache = None
+
+
+class EvaluatedGeometry:
+    """
+    Arrays of an evaluated mesh in object space, see read_evaluated_geometry.
+    The arrays are shared by every reader of the cache and must not be modified.
+    """
+
+    def __init__(self, arrays, materials, corner_normals=None, has_custom_normals=False):
+        self.arrays = arrays
+        # Material names, None for empty slots
+        self.materials = materials
+        self.corner_normals = corner_normals
+        # Custom split normals are not part of the arrays, they are written from the corner normals
+        self.has_custom_normals = has_custom_normals
+
+    @property
+    def nbytes(self):
+        normals = self.corner_normals.nbytes if self.corner_normals is not None else 0
+        return self.arrays.nbytes + normals
+
+
+class GeometryCache:
+    """Evaluated geometry of the export session, the least recently used entries are evicted above the budget"""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.entries = OrderedDict()
+        # State of the modifier stack per object, read once per export
+        self.modifier_keys = {}
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, normals=False):
+        geometry = self.entries.get(key)
+        if geometry is None or (normals and geometry.corner_normals is None):
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return geometry
+
+    def put(self, key, geometry):
+        self.remove(key)
+        if geometry.nbytes > self.budget:
+            return
+        self.entries[key] = geometry
+        self.nbytes += geometry.nbytes
+        while self.nbytes > self.budget:
+            _key, evicted = self.entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def remove(self, key):
+        if geometry := self.entries.pop(key, None):
+            self.nbytes -= geometry.nbytes
+
+    def discard(self, session_uid):
+        """Remove the entries of an object, for temporary objects that are about to be deleted"""
+        for key in [key for key in self.entries if key[0] == session_uid]:
+            self.remove(key)
+        self.modifier_keys.pop(session_uid, None)
+
+    def get_key(self, obj, depsgraph):
+        """The object, the frame and the state of the modifier stack identify an evaluated mesh during an export"""
+        modifiers = self.modifier_keys.get(obj.session_uid)
+        if modifiers is None:
+            modifiers = self.modifier_keys[obj.session_uid] = get_modifiers_key(obj)
+        return obj.session_uid, depsgraph.scene.frame_current, modifiers
+
+
+@contextmanager
+def geometry_session(budget_mb):
+    """Makes a GeometryCache available to get_evaluated_geometry for the duration of the export, 0 disables it"""
+    global active_cache
+
+    if budget_mb <= 0:
+        yield None
+        return
+
+    active_cache = GeometryCache(budget_mb * 1024 * 1024)
+    try:
+        yield active_cache
+    finally:
+        active_cache = None
+
+
+def get_evaluated_geometry(obj, depsgraph, normals=False):
+    """
+    Return the evaluated geometry of an object at the current frame, from the cache of the export session if any.
+    Corner normals are only read when `normals` is set.
+    """
+    if active_cache is None:
+        return read_evaluated_geometry(obj.evaluated_get(depsgraph), normals)
+
+    key = active_cache.get_key(obj, depsgraph)
+    if geometry := active_cache.get(key, normals):
+        return geometry
+    geometry = read_evaluated_geometry(obj.evaluated_get(depsgraph), normals)
+    active_cache.put(key, geometry)
+    return geometry
+
+
+def discard_evaluated_geometry(obj):
+    if active_cache is not None:
+        active_cache.discard(obj.session_uid)
+
+
+def get_cached_bytes():
+    return active_cache.nbytes if active_cache is not None else 0
+
+
+def release_evaluated_geometry():
+    """Empties the cache of the export session, before an asset that needs the memory"""
+    if active_cache is not None:
+        for key in list(active_cache.entries):
+            active_cache.remove(key)
+
+
+def get_modifiers_key(obj):
+    """The modifier stack is not changed by the export, its state is only read when the object is first cached"""
+    return repr([get_rna_values(modifier) for modifier in obj.modifiers])
+
+
+def read_evaluated_geometry(eval_object, normals=False):
+    mesh = eval_object.to_mesh()
+    try:
+        arrays = read_mesh_arrays(mesh)
+        materials = [material.name if material else None for material in mesh.materials]
+        has_custom_normals = mesh.has_custom_normals
+        corner_normals = None
+        if normals:
+            corner_normals = np.empty((len(mesh.loops), 3), dtype=np.float32)
+            mesh.corner_normals.foreach_get("vector", corner_normals.reshape(-1))
+    finally:
+        eval_object.to_mesh_clear()
+    return EvaluatedGeometry(arrays, materials, corner_normals, has_custom_normals)
+
+
+def get_rna_values(struct):
+    """Return the values of all the simple RNA properties of a struct"""
+    values = []
+    for prop in struct.bl_rna.properties:
+        if prop.identifier == "rna_type":
+            continue
+        value = getattr(struct, prop.identifier, None)
+        if prop.type == "POINTER":
+            value = getattr(value, "name", None)
+        elif prop.type == "COLLECTION":
+            continue
+        elif isinstance(value, set):
+            value = tuple(sorted(value))
+        elif hasattr(value, "__len__") and not isinstance(value, str):
+            value = tuple(value)
+        values.append((prop.identifier, value))
+    return values
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import tomllib
+from array import array
+from functools import cache
+from pathlib import Path
+
+from .background_tasks import write_atomic
+from .geometry_cache import get_evaluated_geometry, get_rna_values
+from .utils import get_with_children
+from .vertex_clips import get_animated_object
+
+manifest_name = ".asset_manifest.json"
+
+
+@cache
+def get_addon_version():
+    """Return the version declared in blender_manifest.toml"""
+    with open(Path(__file__).parent / "blender_manifest.toml", "rb") as f:
+        return tomllib.load(f)["version"]
+
+
+class ExportManifest:
+    """
+    On-disk record of the last exported fingerprint of each asset.
+    Stored next to the exported files as `.asset_manifest.json`.
+    """
+
+    def __init__(self, export_path: Path):
+        self.path = export_path / manifest_name
+        self.assets = {}
+        # Files of the previous exports that were replaced by other files, deleted by save when nothing lists them
+        self.replaced_files = set()
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == get_addon_version():
+                    self.assets = data.get("assets", {})
+            except (OSError, ValueError):
+                # A broken manifest only means a full export
+                self.assets = {}
+
+    def is_up_to_date(self, name, fingerprint):
+        """Return True if the asset was exported with the same fingerprint and all its files still exist"""
+        entry = self.assets.get(name)
+        if not entry or entry["fingerprint"] != fingerprint:
+            return False
+        return all((self.path.parent / file).exists() for file in entry["files"])
+
+    def get_fingerprint(self, name):
+        entry = self.assets.get(name)
+        return entry["fingerprint"] if entry else None
+
+    def update(self, name, fingerprint, files):
+        files = [str(Path(file).relative_to(self.path.parent)) for file in files]
+        if entry := self.assets.get(name):
+            # An asset moved into a batch no longer writes its own file
+            self.replaced_files.update(file for file in entry["files"] if file not in files)
+        self.assets[name] = {"fingerprint": fingerprint, "files": files}
+
+    def remove_replaced_files(self):
+        """Delete the replaced files that no asset lists anymore, returns their names"""
+        listed = {file for entry in self.assets.values() for file in entry["files"]}
+        removed = sorted(file for file in self.replaced_files if file not in listed)
+        for file in removed:
+            (self.path.parent / file).unlink(missing_ok=True)
+        self.replaced_files.clear()
+        return removed
+
+    def remove_stale(self, names):
+        """Drop the entries of assets that are no longer exported, returns their names"""
+        stale = [name for name in self.assets if name not in names]
+        for name in stale:
+            del self.assets[name]
+        return stale
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps({"version": get_addon_version(), "assets": self.assets}, indent=2, sort_keys=True)
+        write_atomic(self.path, data.encode("utf-8"))
+
+
+def compute_fingerprint(context, mesh_object, settings):
+    """
+    Return a hash of everything that affects the exported files of an asset:
+    evaluated mesh data, world matrix, children, modifier stack, animation, export settings and addon version.
+    """
+
+    h = hashlib.sha1()
+    h.update(get_addon_version().encode())
+    h.update(json.dumps(settings, sort_keys=True, default=sorted).encode())
+
+    props = mesh_object.export_properties
+    h.update(repr((props.combine_child, props.vertex_animation)).encode())
+    if props.vertex_animation:
+        scene = context.scene
+        h.update(repr((scene.frame_start, scene.frame_end, scene.frame_step, scene.render.fps)).encode())
+        for clip in props.vertex_animation_clips:
+            h.update(repr(get_rna_values(clip)).encode())
+        # The texture holds every frame of the clips, not only the current one
+        hash_animation(h, mesh_object)
+
+    depsgraph = context.evaluated_depsgraph_get()
+    objects = get_with_children(mesh_object) if props.combine_child else [mesh_object]
+    for obj in objects:
+        h.update(obj.name.encode())
+        h.update(array("f", [v for row in obj.matrix_world for v in row]).tobytes())
+        for modifier in obj.modifiers:
+            h.update(repr(get_rna_values(modifier)).encode())
+        if obj.type == "MESH":
+            hash_evaluated_mesh(h, obj, depsgraph)
+
+    return h.hexdigest()
+
+
+def hash_evaluated_mesh(h, obj, depsgraph):
+    """
+    Hashes everything the writers read from the evaluated mesh: topology, every attribute and the corner normals,
+    which also cover the sharp edges and faces and the custom normals. The corner normals stay in the geometry cache
+    for the native writer.
+    """
+    geometry = get_evaluated_geometry(obj, depsgraph, normals=True)
+    arrays = geometry.arrays
+    for values in (arrays.positions, arrays.edges, arrays.corner_verts, arrays.corner_edges, arrays.loop_starts):
+        h.update(values.tobytes())
+    for name in sorted(arrays.attributes):
+        domain, data_type, values = arrays.attributes[name]
+        h.update(repr((name, domain, data_type)).encode())
+        h.update(values.tobytes())
+    h.update(repr(arrays.uv_maps).encode())
+    h.update(geometry.corner_normals.tobytes())
+    h.update(repr(geometry.materials).encode())
+
+
+def hash_animation(h, mesh_object):
+    """
+    Hashes what deforms a vertex animated asset over time: the keyframes of its actions, NLA strips and drivers,
+    and the rest pose, pose and constraints of its armature.
+    """
+    animated_object = get_animated_object(mesh_object)
+    actions = [clip.action for clip in mesh_object.export_properties.vertex_animation_clips]
+    for id_data in (mesh_object, animated_object, getattr(mesh_object.data, "shape_keys", None)):
+        animation_data = id_data.animation_data if id_data else None
+        if animation_data is None:
+            continue
+        h.update(repr((id_data.name, animation_data.use_nla)).encode())
+        actions.append(animation_data.action)
+        for track in animation_data.nla_tracks:
+            h.update(repr((track.name, track.mute, track.is_solo)).encode())
+            for strip in track.strips:
+                h.update(repr(get_rna_values(strip)).encode())
+                actions.append(strip.action)
+        for fcurve in animation_data.drivers:
+            h.update(repr(get_rna_values(fcurve.driver)).encode())
+            for variable in fcurve.driver.variables:
+                h.update(repr(get_rna_values(variable)).encode())
+                for target in variable.targets:
+                    h.update(repr(get_rna_values(target)).encode())
+            hash_fcurve(h, fcurve)
+
+    for action in dict.fromkeys(action for action in actions if action):
+        h.update(action.name.encode())
+        for fcurve in get_fcurves(action):
+            hash_fcurve(h, fcurve)
+
+    if animated_object.type == "ARMATURE":
+        h.update(array("f", [v for row in animated_object.matrix_world for v in row]).tobytes())
+        bones = animated_object.data.bones
+        h.update(repr([bone.name for bone in bones]).encode())
+        matrices = array("f", [0.0]) * (len(bones) * 16)
+        bones.foreach_get("matrix_local", matrices)
+        h.update(matrices.tobytes())
+        pose_bones = animated_object.pose.bones
+        pose_bones.foreach_get("matrix_basis", matrices)
+        h.update(matrices.tobytes())
+        for pose_bone in pose_bones:
+            for constraint in pose_bone.constraints:
+                h.update(repr(get_rna_values(constraint)).encode())
+
+
+def get_fcurves(action):
+    """Return the F-Curves of an action, from all the slots of a layered action"""
+    layers = getattr(action, "layers", None)
+    if layers:
+        return [
+            fcurve
+            for layer in layers
+            for strip in layer.strips
+            for channelbag in strip.channelbags
+            for fcurve in channelbag.fcurves
+        ]
+    return list(action.fcurves)
+
+
+def hash_fcurve(h, fcurve):
+    h.update(repr((fcurve.data_path, fcurve.array_index, fcurve.mute, fcurve.extrapolation)).encode())
+    points = fcurve.keyframe_points
+    values = array("f", [0.0]) * (len(points) * 2)
+    for attribute in ("co", "handle_left", "handle_right"):
+        points.foreach_get(attribute, values)
+        h.update(values.tobytes())
+    modes = array("i", [0]) * len(points)
+    for attribute in ("interpolation", "easing"):
+        points.foreach_get(attribute, modes)
+        h.update(modes.tobytes())
+    for modifier in fcurve.modifiers:
+        h.update(repr(get_rna_values(modifier)).encode())
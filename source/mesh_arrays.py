@@ -0,0 +1,203 @@
+import numpy as np
+
+# Property used by foreach_get/foreach_set, number of components and dtype of each attribute type
+attribute_fields = {
+    "FLOAT": ("value", 1, np.float32),
+    "INT": ("value", 1, np.int32),
+    "INT8": ("value", 1, np.int32),
+    "BOOLEAN": ("value", 1, bool),
+    "FLOAT2": ("vector", 2, np.float32),
+    "INT32_2D": ("value", 2, np.int32),
+    "FLOAT_VECTOR": ("vector", 3, np.float32),
+    "FLOAT_COLOR": ("color", 4, np.float32),
+    "BYTE_COLOR": ("color_srgb", 4, np.float32),
+    "QUATERNION": ("value", 4, np.float32),
+    "FLOAT4X4": ("value", 16, np.float32),
+}
+
+# Value of an attribute for the elements of meshes that do not have it, zero if not listed
+attribute_defaults = {
+    "FLOAT_COLOR": (1, 1, 1, 1),
+    "BYTE_COLOR": (1, 1, 1, 1),
+    "QUATERNION": (1, 0, 0, 0),
+    "FLOAT4X4": tuple(np.identity(4, dtype=np.float32).ravel()),
+}
+
+
+class MeshArrays:
+    """Topology and attributes of a mesh, read with foreach_get"""
+
+    def __init__(self, positions, edges, corner_verts, corner_edges, loop_starts, attributes, uv_maps):
+        self.positions = positions
+        self.edges = edges
+        self.corner_verts = corner_verts
+        self.corner_edges = corner_edges
+        self.loop_starts = loop_starts
+        # name -> (domain, data_type, values)
+        self.attributes = attributes
+        self.uv_maps = uv_maps
+
+    @property
+    def domain_sizes(self):
+        return {
+            "POINT": len(self.positions),
+            "EDGE": len(self.edges),
+            "CORNER": len(self.corner_verts),
+            "FACE": len(self.loop_starts),
+        }
+
+    @property
+    def nbytes(self):
+        arrays = [self.positions, self.edges, self.corner_verts, self.corner_edges, self.loop_starts]
+        arrays.extend(values for _domain, _data_type, values in self.attributes.values())
+        return sum(array.nbytes for array in arrays)
+
+
+def read_mesh_arrays(mesh, matrix=None):
+    """Read the topology and the generic attributes of a mesh, optionally transforming the positions"""
+
+    positions = np.empty((len(mesh.vertices), 3), dtype=np.float32)
+    mesh.vertices.foreach_get("co", positions.reshape(-1))
+    if matrix is not None:
+        positions = transform_positions(positions, matrix)
+
+    edges = np.empty((len(mesh.edges), 2), dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edges.reshape(-1))
+
+    corner_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", corner_verts)
+    corner_edges = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("edge_index", corner_edges)
+
+    loop_starts = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", loop_starts)
+
+    domain_sizes = {"POINT": len(positions), "EDGE": len(edges), "CORNER": len(corner_verts), "FACE": len(loop_starts)}
+    attributes = {}
+    for attribute in mesh.attributes:
+        if attribute.is_internal or attribute.is_required or attribute.data_type not in attribute_fields:
+            continue
+        if attribute.domain not in domain_sizes:
+            continue
+        field, components, dtype = attribute_fields[attribute.data_type]
+        values = np.empty((domain_sizes[attribute.domain], components), dtype=dtype)
+        attribute.data.foreach_get(field, values.reshape(-1))
+        attributes[attribute.name] = (attribute.domain, attribute.data_type, values)
+
+    uv_maps = [uv_layer.name for uv_layer in mesh.uv_layers]
+    return MeshArrays(positions, edges, corner_verts, corner_edges, loop_starts, attributes, uv_maps)
+
+
+def transform_positions(positions, matrix):
+    matrix = np.array(matrix, dtype=np.float64)
+    return (positions @ matrix[:3, :3].T + matrix[:3, 3]).astype(np.float32)
+
+
+def transform_normals(normals, matrix):
+    """Return normals moved by the inverse transpose of the matrix, normalized"""
+    matrix = np.array(matrix, dtype=np.float64)[:3, :3]
+    normals = normals @ np.linalg.inv(matrix)
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    return (normals / np.maximum(lengths, 1e-12)).astype(np.float32)
+
+
+def transform_mesh_arrays(arrays: MeshArrays, matrix):
+    """Return a copy of the arrays with transformed positions, the other arrays are shared"""
+    return MeshArrays(
+        transform_positions(arrays.positions, matrix),
+        arrays.edges,
+        arrays.corner_verts,
+        arrays.corner_edges,
+        arrays.loop_starts,
+        arrays.attributes,
+        arrays.uv_maps,
+    )
+
+
+def concatenate_mesh_arrays(chunks):
+    """Concatenate the arrays of several meshes, offsetting the indices of each one"""
+
+    def concat(arrays, shape, dtype):
+        return np.concatenate(arrays) if arrays else np.empty(shape, dtype=dtype)
+
+    vertex_offset = edge_offset = loop_offset = 0
+    edges, corner_verts, corner_edges, loop_starts = [], [], [], []
+    for chunk in chunks:
+        edges.append(chunk.edges + vertex_offset)
+        corner_verts.append(chunk.corner_verts + vertex_offset)
+        corner_edges.append(chunk.corner_edges + edge_offset)
+        loop_starts.append(chunk.loop_starts + loop_offset)
+        vertex_offset += len(chunk.positions)
+        edge_offset += len(chunk.edges)
+        loop_offset += len(chunk.corner_verts)
+
+    # Attributes are matched by name, in the order they are first found
+    layouts = {}
+    uv_maps = []
+    for chunk in chunks:
+        for name, (domain, data_type, _values) in chunk.attributes.items():
+            layouts.setdefault(name, (domain, data_type))
+        uv_maps.extend(name for name in chunk.uv_maps if name not in uv_maps)
+
+    attributes = {}
+    for name, (domain, data_type) in layouts.items():
+        _field, components, dtype = attribute_fields[data_type]
+        default = attribute_defaults.get(data_type, (0,) * components)
+        values = []
+        for chunk in chunks:
+            size = chunk.domain_sizes[domain]
+            it = chunk.attributes.get(name)
+            if it and it[0] == domain and it[1] == data_type:
+                values.append(it[2])
+            else:
+                values.append(np.tile(np.array(default, dtype=dtype), (size, 1)))
+        attributes[name] = (domain, data_type, concat(values, (0, components), dtype))
+
+    return MeshArrays(
+        concat([chunk.positions for chunk in chunks], (0, 3), np.float32),
+        concat(edges, (0, 2), np.int32),
+        concat(corner_verts, (0,), np.int32),
+        concat(corner_edges, (0,), np.int32),
+        concat(loop_starts, (0,), np.int32),
+        attributes,
+        [name for name in uv_maps if name in attributes],
+    )
+
+
+def write_mesh_arrays(mesh, arrays: MeshArrays):
+    """Fill an empty mesh with the given arrays"""
+
+    mesh.vertices.add(len(arrays.positions))
+    mesh.edges.add(len(arrays.edges))
+    mesh.loops.add(len(arrays.corner_verts))
+    mesh.polygons.add(len(arrays.loop_starts))
+
+    mesh.vertices.foreach_set("co", arrays.positions.reshape(-1))
+    mesh.edges.foreach_set("vertices", arrays.edges.reshape(-1))
+    mesh.loops.foreach_set("vertex_index", arrays.corner_verts)
+    mesh.loops.foreach_set("edge_index", arrays.corner_edges)
+    mesh.polygons.foreach_set("loop_start", arrays.loop_starts)
+
+    for name in arrays.uv_maps:
+        mesh.uv_layers.new(name=name, do_init=False)
+
+    for name, (domain, data_type, values) in arrays.attributes.items():
+        attribute = mesh.attributes.get(name)
+        if attribute is None:
+            attribute = mesh.attributes.new(name, data_type, domain)
+        field, _components, _dtype = attribute_fields[data_type]
+        attribute.data.foreach_set(field, values.reshape(-1))
+
+    mesh.update()
+
+
+def write_vertex_uvs(mesh, layer_name, vertex_uvs):
+    """
+    Fills a UV layer, created if missing, from per-vertex coordinates (vertex, 2).
+    The corners are mapped to their vertex with a single foreach_get and written with a single foreach_set.
+    """
+    uv_layer = mesh.uv_layers.get(layer_name) or mesh.uv_layers.new(name=layer_name, do_init=False)
+    corner_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", corner_verts)
+    uvs = np.asarray(vertex_uvs, dtype=np.float32)[corner_verts]
+    uv_layer.uv.foreach_set("vector", uvs.reshape(-1))
@@ -0,0 +1,159 @@
+import cProfile
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+import bpy
+
+profile_log_name = "export_profile.json"
+
+# Data collections checked to count the datablocks created and freed by each stage
+tracked_datablocks = ["meshes", "objects", "images"]
+
+# Profiler of the running export, None when profiling is disabled
+active_profiler = None
+
+# Summary of the last profiled export, shown in the panel
+last_summary = None
+
+
+def get_datablock_ids():
+    """Identifiers of all the tracked datablocks, walks the whole file so it is only used once per export"""
+    return {(name, id_data.session_uid) for name in tracked_datablocks for id_data in getattr(bpy.data, name)}
+
+
+def get_datablock_count():
+    return sum(len(getattr(bpy.data, name)) for name in tracked_datablocks)
+
+
+class ExportProfiler:
+    """
+    Collects the time spent in each stage of the export, per asset.
+    Stages outside any asset (like the collection scan) are stored at the run level.
+    Datablocks are compared at the export level, and only counted per asset, so that stages stay cheap.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.assets = {}
+        self.run_stages = defaultdict(float)
+        self.datablock_ids = get_datablock_ids()
+        self.created = 0
+        self.freed = 0
+        self.current = None
+        # Assets exported by parallel workers, their stages are not measured
+        self.parallel_assets = 0
+
+    @contextmanager
+    def asset(self, name, profile_path: Path = None):
+        # Net change of the number of datablocks, a leak when positive
+        record = {"total": 0.0, "stages": defaultdict(float), "datablocks": 0}
+        self.assets[name] = record
+        self.current = record
+
+        profiler = cProfile.Profile() if profile_path else None
+        count = get_datablock_count()
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(str(profile_path))
+            record["total"] = time.perf_counter() - start
+            record["datablocks"] = get_datablock_count() - count
+            self.current = None
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if self.current is not None:
+                self.current["stages"][name] += elapsed
+            else:
+                self.run_stages[name] += elapsed
+
+    def finish(self):
+        """Compares the datablocks with the start of the export"""
+        after = get_datablock_ids()
+        self.created = len(after - self.datablock_ids)
+        self.freed = len(self.datablock_ids - after)
+
+    def summary(self):
+        """Return the total time per stage and the assets sorted from the slowest"""
+        stages = defaultdict(float, self.run_stages)
+        for record in self.assets.values():
+            for name, elapsed in record["stages"].items():
+                stages[name] += elapsed
+        return {
+            "total": time.perf_counter() - self.start,
+            "stages": dict(sorted(stages.items(), key=lambda it: it[1], reverse=True)),
+            "slowest_assets": sorted(self.assets, key=lambda it: self.assets[it]["total"], reverse=True),
+            "datablocks_created": self.created,
+            "datablocks_freed": self.freed,
+            "parallel_assets": self.parallel_assets,
+        }
+
+    def write(self, path: Path):
+        self.finish()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"summary": self.summary(), "assets": self.assets}, f, indent=2)
+
+
+@contextmanager
+def profile_export(enabled=True):
+    """Makes an ExportProfiler available to `stage` for the duration of the export"""
+    global active_profiler, last_summary
+
+    if not enabled:
+        yield None
+        return
+
+    active_profiler = ExportProfiler()
+    try:
+        yield active_profiler
+    finally:
+        active_profiler.finish()
+        last_summary = active_profiler.summary()
+        active_profiler = None
+
+
+@contextmanager
+def profile_asset(name, profile_path: Path = None):
+    """Attributes the stages to an asset, optionally capturing a cProfile of it"""
+    if active_profiler is None:
+        yield
+        return
+    with active_profiler.asset(name, profile_path):
+        yield
+
+
+@contextmanager
+def stage(name):
+    """Times a stage of the export, does nothing when profiling is disabled"""
+    if active_profiler is None:
+        yield
+        return
+    with active_profiler.stage(name):
+        yield
+
+
+def record_frame_times(frame_times, scoped):
+    """Stores the evaluation time of the sampled frames in the profile of the current asset"""
+    if not frame_times or active_profiler is None or active_profiler.current is None:
+        return
+    timings = {
+        "frames": len(frame_times),
+        "total": sum(frame_times),
+        "mean": sum(frame_times) / len(frame_times),
+        "max": max(frame_times),
+        "scoped": scoped,
+    }
+    active_profiler.current["frame_evaluation"] = timings
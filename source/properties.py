@@ -1,5 +1,7 @@
 import bpy
 
+from .vertex_encoding import vertex_encodings
+
 
 class ExportSceneProperties(bpy.types.PropertyGroup):
     """
@@ -14,6 +16,179 @@ class ExportSceneProperties(bpy.types.PropertyGroup):
         subtype="DIR_PATH",
     )
 
+    incremental_export: bpy.props.BoolProperty(
+        name="Incremental Export",
+        description="Skip assets that have not changed since the last export",
+        default=False,
+    )
+
+    parallel_jobs: bpy.props.IntProperty(
+        name="Parallel Jobs",
+        description="Number of background Blender processes used to export the assets, 1 exports in this process",
+        default=1,
+        min=1,
+        soft_max=64,
+    )
+
+    use_native_writer: bpy.props.BoolProperty(
+        name="Native FBX Writer",
+        description="Write the FBX files directly, without the FBX operator, selection changes or temporary renames",
+        default=False,
+    )
+
+    pipelined_writes: bpy.props.BoolProperty(
+        name="Pipelined Writes",
+        description="Write the files of the native FBX writer and the JSON descriptions in background threads "
+        "while the next assets are evaluated",
+        default=True,
+    )
+
+    writer_queue_budget: bpy.props.IntProperty(
+        name="Writer Queue (MB)",
+        description="Maximum size of the files waiting to be written, the export waits for the writes above it",
+        default=256,
+        min=1,
+    )
+
+    export_memory_budget: bpy.props.IntProperty(
+        name="Memory Budget (MB)",
+        description="Memory available to the export, heavy assets wait for the pending writes or share a single "
+        "parallel job above it, 0 disables the limit",
+        default=0,
+        min=0,
+    )
+
+    geometry_cache_budget: bpy.props.IntProperty(
+        name="Geometry Cache (MB)",
+        description="Memory used to keep the evaluated meshes shared by the fingerprint, combine and export steps, "
+        "0 disables the cache",
+        default=512,
+        min=0,
+    )
+
+    batch_small_assets: bpy.props.BoolProperty(
+        name="Batch Small Assets",
+        description="Export the small assets of each child collection of 'Export' into a single FBX named after it",
+        default=False,
+    )
+
+    batch_vertex_threshold: bpy.props.IntProperty(
+        name="Batch Vertex Threshold",
+        description="Assets with more vertices than this are always exported individually",
+        default=5000,
+        min=0,
+    )
+
+    vertex_animation_encoding: bpy.props.EnumProperty(
+        name="Texture Encoding",
+        description="Format of the vertex animation offsets texture",
+        items=vertex_encodings,
+        default="FLOAT",
+    )
+
+    vertex_animation_pack_normals: bpy.props.BoolProperty(
+        name="Pack Normals",
+        description="Store octahedral-encoded normals in the alpha channel of the offsets texture, "
+        "with the EXR encodings only",
+        default=False,
+    )
+
+    vertex_animation_reduce: bpy.props.BoolProperty(
+        name="Reduce Frames",
+        description="Drop the frames that can be interpolated from their neighbours, the kept frames are listed in "
+        "the JSON file next to the texture",
+        default=False,
+    )
+
+    vertex_animation_tolerance: bpy.props.FloatProperty(
+        name="Tolerance",
+        description="Maximum distance between a dropped frame and the interpolation of the kept frames",
+        default=0.0005,
+        min=0.0,
+        precision=5,
+        subtype="DISTANCE",
+    )
+
+    vertex_animation_scoped_evaluation: bpy.props.BoolProperty(
+        name="Scoped Evaluation",
+        description="Sample the frames in a temporary view layer without the collections unrelated to the object",
+        default=False,
+    )
+
+    vertex_animation_max_width: bpy.props.IntProperty(
+        name="Max Width",
+        description="Maximum width of the vertex animation texture, wider meshes are folded in several rows per frame",
+        default=4096,
+        min=1,
+    )
+
+    vertex_animation_power_of_two: bpy.props.BoolProperty(
+        name="Power of Two",
+        description="Round the vertex animation texture size up to powers of two",
+        default=False,
+    )
+
+    vertex_animation_atlas: bpy.props.BoolProperty(
+        name="Atlas",
+        description="Pack the vertex animations of all the exported objects in a single texture",
+        default=False,
+    )
+
+    vertex_animation_atlas_name: bpy.props.StringProperty(
+        name="Atlas Name",
+        description="Name of the atlas texture, without extension",
+        default="vertex_animation_atlas",
+    )
+
+    vertex_animation_atlas_width: bpy.props.IntProperty(
+        name="Atlas Width",
+        description="Maximum width of the atlas texture, wider animations get a row of their own",
+        default=4096,
+        min=1,
+    )
+
+    enable_profiling: bpy.props.BoolProperty(
+        name="Profile Export",
+        description="Time each stage of the export and write the results to export_profile.json, and the cost "
+        "estimates of the assets to export_schedule.json",
+        default=False,
+    )
+
+    profile_asset: bpy.props.StringProperty(
+        name="cProfile Asset",
+        description="Name of an asset to capture with cProfile, the stats are written next to its FBX",
+        default="",
+    )
+
+
+class VertexAnimationClip(bpy.types.PropertyGroup):
+    """A clip baked in the vertex animation texture, the name is the one of the clip table"""
+
+    action: bpy.props.PointerProperty(
+        name="Action",
+        description="Action assigned to the animated object while sampling the clip, empty keeps the current animation",
+        type=bpy.types.Action,
+    )
+
+    frame_start: bpy.props.IntProperty(
+        name="Start",
+        description="First frame of the clip",
+        default=1,
+    )
+
+    frame_end: bpy.props.IntProperty(
+        name="End",
+        description="End of the clip, excluded like the end of the scene range",
+        default=250,
+    )
+
+    frame_step: bpy.props.IntProperty(
+        name="Step",
+        description="Number of frames between two samples",
+        default=1,
+        min=1,
+    )
+
 
 class ObjectProperties(bpy.types.PropertyGroup):
     """
@@ -38,3 +213,14 @@ class ObjectProperties(bpy.types.PropertyGroup):
         description="Enable vertex animation export for this object",
         default=False,
     )
+
+    vertex_animation_clips: bpy.props.CollectionProperty(
+        name="Clips",
+        description="Clips baked in the vertex animation texture, the scene range is used if empty",
+        type=VertexAnimationClip,
+    )
+
+    vertex_animation_clip_index: bpy.props.IntProperty(
+        name="Active Clip",
+        default=0,
+    )
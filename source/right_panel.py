@@ -1,7 +1,11 @@
 import bpy
 
+from . import profiling
+from .export_index import export_index
 from .export_meshes import ExportAssets
 from .utils import shelf_name, relevant_objects, FT_VertexAnimation
+from .vertex_clips import VertexAnimationClipAdd, VertexAnimationClipRemove, VertexAnimationClipsFromNLA
+from .vertex_encoding import packed_normal_encodings
 
 
 class VIEW3D_PT_AssetManager(bpy.types.Panel):
@@ -27,7 +31,22 @@ class VIEW3D_PT_AssetManager(bpy.types.Panel):
         layout.label(text="Unity Asset Export", icon="EXPORT")
 
         layout.operator(ExportAssets.bl_idname)
+        draw_index_counts(layout)
         layout.prop(props, "export_path")
+        layout.prop(props, "incremental_export")
+        layout.prop(props, "parallel_jobs")
+        layout.prop(props, "export_memory_budget")
+        layout.prop(props, "use_native_writer")
+        layout.prop(props, "geometry_cache_budget")
+        layout.prop(props, "pipelined_writes")
+        if props.pipelined_writes:
+            layout.prop(props, "writer_queue_budget")
+        layout.prop(props, "batch_small_assets")
+        if props.batch_small_assets:
+            layout.prop(props, "batch_vertex_threshold")
+        layout.prop(props, "enable_profiling")
+        if props.enable_profiling:
+            draw_profiling(layout, props)
 
         if obj := get_active_object():
             layout.separator()
@@ -46,9 +65,83 @@ class VIEW3D_PT_AssetManager(bpy.types.Panel):
                 layout.use_property_decorate = False
                 col = layout.column(align=True)
                 col.enabled = export_properties.vertex_animation
-                col.prop(scene, "frame_start", text="Frame Start")
-                col.prop(scene, "frame_end", text="End")
-                col.prop(scene, "frame_step", text="Step")
+                if not export_properties.vertex_animation_clips:
+                    col.prop(scene, "frame_start", text="Frame Start")
+                    col.prop(scene, "frame_end", text="End")
+                    col.prop(scene, "frame_step", text="Step")
+                draw_clips(col, export_properties)
+                col.prop(props, "vertex_animation_encoding")
+                row = col.row()
+                row.enabled = props.vertex_animation_encoding in packed_normal_encodings
+                row.prop(props, "vertex_animation_pack_normals")
+                col.prop(props, "vertex_animation_reduce")
+                if props.vertex_animation_reduce:
+                    col.prop(props, "vertex_animation_tolerance")
+                col.prop(props, "vertex_animation_scoped_evaluation")
+                col.prop(props, "vertex_animation_max_width")
+                col.prop(props, "vertex_animation_power_of_two")
+                col.prop(props, "vertex_animation_atlas")
+                if props.vertex_animation_atlas:
+                    col.prop(props, "vertex_animation_atlas_name")
+                    col.prop(props, "vertex_animation_atlas_width")
+
+
+def draw_index_counts(layout):
+    """Draws the number of assets and of those changed since the last export, without scanning the scene"""
+    total, changed = export_index.counts()
+    if total is None:
+        return
+    if changed is None:
+        layout.label(text=f"{total} assets")
+    else:
+        layout.label(text=f"{total} assets, {changed} changed since the last export")
+
+
+def draw_clips(layout, export_properties):
+    """Draws the clip list of the vertex animation"""
+    row = layout.row()
+    row.template_list(
+        "UI_UL_list",
+        "vertex_animation_clips",
+        export_properties,
+        "vertex_animation_clips",
+        export_properties,
+        "vertex_animation_clip_index",
+        rows=3,
+    )
+    buttons = row.column(align=True)
+    buttons.operator(VertexAnimationClipAdd.bl_idname, icon="ADD", text="")
+    buttons.operator(VertexAnimationClipRemove.bl_idname, icon="REMOVE", text="")
+    layout.operator(VertexAnimationClipsFromNLA.bl_idname, icon="NLA")
+
+    index = export_properties.vertex_animation_clip_index
+    if 0 <= index < len(export_properties.vertex_animation_clips):
+        clip = export_properties.vertex_animation_clips[index]
+        layout.prop(clip, "action")
+        layout.prop(clip, "frame_start")
+        layout.prop(clip, "frame_end")
+        layout.prop(clip, "frame_step")
+
+
+def draw_profiling(layout, props):
+    """Draws the timings of the last profiled export"""
+    box = layout.box()
+    box.prop(props, "profile_asset")
+
+    summary = profiling.last_summary
+    if not summary:
+        box.label(text="No profiled export yet")
+        return
+
+    col = box.column(align=True)
+    col.label(text=f"Total: {summary['total']:.2f} s")
+    for name, elapsed in list(summary["stages"].items())[:6]:
+        col.label(text=f"{name}: {elapsed:.2f} s")
+    col.label(text=f"Datablocks: +{summary['datablocks_created']} / -{summary['datablocks_freed']}")
+    if summary["slowest_assets"]:
+        col.label(text=f"Slowest: {', '.join(summary['slowest_assets'][:3])}")
+    if summary["parallel_assets"]:
+        col.label(text=f"{summary['parallel_assets']} assets exported by workers, not profiled", icon="INFO")
 
 
 def get_active_object():
@@ -0,0 +1,106 @@
+from contextlib import contextmanager
+
+import bpy
+
+
+def get_dependencies(obj):
+    """
+    Return the objects the evaluation of `obj` may read: itself, its parents and the objects referenced
+    by modifiers, constraints and drivers, recursively.
+    """
+    dependencies = set()
+    pending = [obj]
+    while pending:
+        it = pending.pop()
+        if it is None or it in dependencies:
+            continue
+        dependencies.add(it)
+        pending.append(it.parent)
+        pending.extend(get_referenced_objects(it))
+    return dependencies
+
+
+def get_referenced_objects(obj):
+    """Yield the objects referenced by the modifiers, constraints and drivers of an object"""
+    structs = [*obj.modifiers, *obj.constraints]
+    if obj.pose:
+        structs.extend(constraint for bone in obj.pose.bones for constraint in bone.constraints)
+
+    for struct in structs:
+        for prop in struct.bl_rna.properties:
+            if prop.type == "POINTER":
+                yield from get_objects(getattr(struct, prop.identifier, None))
+        # Armature constraints
+        for target in getattr(struct, "targets", ()):
+            yield target.target
+
+    # Inputs of geometry nodes modifiers
+    for modifier in obj.modifiers:
+        if modifier.type == "NODES":
+            for key in modifier.keys():
+                yield from get_objects(modifier[key])
+
+    shape_keys = getattr(obj.data, "shape_keys", None)
+    for id_data in (obj, obj.data, shape_keys):
+        animation_data = getattr(id_data, "animation_data", None)
+        if animation_data is None:
+            continue
+        for fcurve in animation_data.drivers:
+            for variable in fcurve.driver.variables:
+                for target in variable.targets:
+                    yield from get_objects(target.id)
+
+
+def get_objects(value):
+    if isinstance(value, bpy.types.Object):
+        return [value]
+    if isinstance(value, bpy.types.Collection):
+        return list(value.all_objects)
+    return []
+
+
+scoped_layer_name = "scoped_evaluation__temp__"
+
+
+@contextmanager
+def scoped_evaluation(context, obj, enabled=True):
+    """
+    Evaluates the frames in a temporary view layer which excludes the collections without any dependency of `obj`,
+    so that changing frame does not evaluate objects that are never read. The view layers of the user are left as is,
+    excluding collections there would rebuild the relations of their depsgraph.
+    Yields a function setting the frame and returning the depsgraph to read the evaluated objects from.
+    """
+    scene = context.scene
+    if not enabled:
+
+        def evaluate_frame(frame):
+            scene.frame_set(frame)
+            return context.evaluated_depsgraph_get()
+
+        yield evaluate_frame
+        return
+
+    view_layer = scene.view_layers.new(scoped_layer_name)
+    try:
+        dependencies = get_dependencies(obj)
+        pending = list(view_layer.layer_collection.children)
+        while pending:
+            layer_collection = pending.pop()
+            if any(it in dependencies for it in layer_collection.collection.all_objects):
+                pending.extend(layer_collection.children)
+            else:
+                layer_collection.exclude = True
+        # A new view layer has no depsgraph until it is updated once
+        view_layer.update()
+        depsgraph = view_layer.depsgraph
+        assert depsgraph is not None
+
+        def evaluate_frame(frame):
+            # frame_set would also evaluate the view layers of the user, only the temporary one is updated
+            scene.frame_current = frame
+            depsgraph.update()
+            return depsgraph
+
+        yield evaluate_frame
+    finally:
+        scene.view_layers.remove(view_layer)
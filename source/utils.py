@@ -1,7 +1,11 @@
 from contextlib import contextmanager
 
 import bpy
-import bmesh
+import numpy as np
+
+from .geometry_cache import get_evaluated_geometry
+from .mesh_arrays import concatenate_mesh_arrays, transform_mesh_arrays, transform_normals, write_mesh_arrays
+from .profiling import stage
 
 shelf_name = "Tools"
 relevant_objects = ["MESH", "EMPTY"]
@@ -17,33 +21,107 @@ def show_message_box(message="", title="Message Box", icon="INFO"):
     bpy.context.window_manager.popup_menu(draw, title=title, icon=icon)
 
 
+class ObjectModeState:
+    """Selection, active object, mode and frame of the view layer, see enter_object_mode"""
+
+    def __init__(self):
+        # Names rather than references, the objects may be removed by an undo before the state is restored
+        self.selected_names = [obj.name for obj in bpy.context.selected_objects]
+        active_object = bpy.context.view_layer.objects.active
+        self.active_name = active_object.name if active_object else None
+        self.mode = active_object.mode if active_object else "OBJECT"
+        self.frame = bpy.context.scene.frame_current
+
+    def restore(self):
+        bpy.ops.object.select_all(action="DESELECT")
+
+        for name in self.selected_names:
+            if obj := bpy.data.objects.get(name):
+                obj.select_set(True)
+
+        active_object = bpy.data.objects.get(self.active_name) if self.active_name else None
+        bpy.context.view_layer.objects.active = active_object
+        if active_object and active_object.mode != self.mode:
+            bpy.ops.object.mode_set(mode=self.mode)
+
+        bpy.context.scene.frame_current = self.frame
+
+
+# State of the view layer before the running export session, None outside of a session
+active_mode_session = None
+
+
+def enter_object_mode():
+    """Backup the current state, then switch to object mode with nothing selected"""
+    state = ObjectModeState()
+    bpy.ops.object.select_all(action="DESELECT")
+    if bpy.context.mode != "OBJECT":
+        bpy.ops.object.mode_set(mode="OBJECT")
+    return state
+
+
+@contextmanager
+def object_mode_session(enabled=True):
+    """
+    Enters object mode and clears the selection once for a whole export, the state is restored on exit.
+    Inside the session run_in_object_mode only reverts what each asset changes.
+    """
+    global active_mode_session
+
+    if not enabled or active_mode_session is not None:
+        yield
+        return
+
+    with stage("mode_switch"):
+        active_mode_session = enter_object_mode()
+    try:
+        yield
+    finally:
+        state = active_mode_session
+        active_mode_session = None
+        with stage("mode_switch"):
+            state.restore()
+
+
 @contextmanager
 def run_in_object_mode(enabled=True):
     if not enabled:
         yield
         return
 
-    # Backup the current selection and active object
-    selected_objects = [obj for obj in bpy.context.selected_objects]
-    active_object = bpy.context.view_layer.objects.active
-    mode = active_object.mode if active_object else "OBJECT"
-    bpy.ops.object.select_all(action="DESELECT")
-    if bpy.context.mode != "OBJECT":
-        bpy.ops.object.mode_set(mode="OBJECT")
-    old_frame = bpy.context.scene.frame_current
-
-    yield
+    if active_mode_session is not None:
+        # Already in object mode with nothing selected, only the changes of the asset are reverted
+        active_object = bpy.context.view_layer.objects.active
+        old_frame = bpy.context.scene.frame_current
+        try:
+            yield
+        finally:
+            with stage("mode_switch"):
+                deselect_all()
+                if bpy.context.mode != "OBJECT":
+                    bpy.ops.object.mode_set(mode="OBJECT")
+                bpy.context.view_layer.objects.active = active_object
+                bpy.context.scene.frame_current = old_frame
+        return
 
-    bpy.ops.object.select_all(action="DESELECT")
+    with stage("mode_switch"):
+        state = enter_object_mode()
 
-    for obj in selected_objects:
-        obj.select_set(True)
+    # The state is restored on errors and when a cancelled export closes its generator
+    try:
+        yield
+    finally:
+        with stage("mode_switch"):
+            state.restore()
 
-    bpy.context.view_layer.objects.active = active_object
-    if active_object and active_object.mode != mode:
-        bpy.ops.object.mode_set(mode=mode)
 
-    bpy.context.scene.frame_current = old_frame
+def deselect_all():
+    """Deselects every object, only visiting the selected ones inside an object mode session"""
+    if active_mode_session is None:
+        bpy.ops.object.select_all(action="DESELECT")
+        return
+    for obj in bpy.context.selected_objects:
+        obj.select_set(False)
 
 
 @contextmanager
@@ -76,29 +154,34 @@ def get_with_children(data_object):
 def combine_children(name: str, mesh_object):
     """
     Combines multiple mesh objects into a single mesh object.
+    The arrays of each child are read with foreach_get, or taken from the geometry cache,
+    moved into the parent space and written in a single pass.
+    When any child has custom split normals, the corner normals of every child are kept as custom normals.
     """
 
     depsgraph = bpy.context.evaluated_depsgraph_get()
-    bm = bmesh.new()
+    parent_inverse = mesh_object.matrix_world.inverted()
 
-    for child in get_with_children(mesh_object):
-        eval_object = child.evaluated_get(depsgraph)
-        it_data = bpy.data.meshes.new_from_object(eval_object)
-        it_data.transform(child.matrix_world)
-        it_data.transform(mesh_object.matrix_world.inverted())
-        bm.from_mesh(it_data)
-        bpy.data.meshes.remove(it_data)
+    children = get_with_children(mesh_object)
+    matrices = [parent_inverse @ child.matrix_world for child in children]
+    geometries = [get_evaluated_geometry(child, depsgraph) for child in children]
+    chunks = [transform_mesh_arrays(geometry.arrays, matrix) for geometry, matrix in zip(geometries, matrices)]
 
     mesh_data = bpy.data.meshes.new("combined_mesh")
-    bm.normal_update()
-    bm.to_mesh(mesh_data)
-    bm.free()
-    mesh_data.update()
+    write_mesh_arrays(mesh_data, concatenate_mesh_arrays(chunks))
+
+    if any(geometry.has_custom_normals for geometry in geometries):
+        normals = [
+            transform_normals(get_evaluated_geometry(child, depsgraph, normals=True).corner_normals, matrix)
+            for child, matrix in zip(children, matrices)
+        ]
+        mesh_data.normals_split_custom_set(np.concatenate(normals).tolist())
 
     ob = bpy.data.objects.new(name, mesh_data)
     bpy.context.scene.collection.objects.link(ob)
     return ob
 
+
 def get_or_create_export_collection():
     """
     Gets or creates the export collection in the current Blender scene.
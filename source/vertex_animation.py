@@ -1,74 +1,161 @@
+import json
+import time
 from pathlib import Path
 
 import bpy
+import numpy as np
 from mathutils import Vector
 
-
-def get_per_frame_mesh_data(context, mesh_object):
-    """Return a list of combined mesh data per frame"""
-    meshes = []
-    for i in frame_range(context.scene):
-        context.scene.frame_set(i)
-
-        # Creates a new mesh data frm the evaluated mesh object
-        eval_object = mesh_object.evaluated_get(context.evaluated_depsgraph_get())
-        mesh_data = bpy.data.meshes.new_from_object(eval_object)
-        # mesh_data.transform(mesh_object.matrix_world)
-        mesh_data.name = f"{mesh_object.name}_frame_{i}"
-
-        meshes.append(mesh_data)
-
-    return meshes
-
-
-def create_export_mesh_object(context, mesh_data):
+from .background_tasks import run_in_background, staged_file, write_atomic
+from .mesh_arrays import write_vertex_uvs
+from .profiling import record_frame_times, stage
+from .scoped_evaluation import scoped_evaluation
+from .vertex_clips import VertexClip, frame_range, get_animated_object, get_vertex_clips, use_action
+from .vertex_encoding import (
+    VertexLayout,
+    check_packed_normals,
+    encode_vertex_animation,
+    encoding_formats,
+    reduce_frames,
+)
+
+
+def sample_vertex_frames(context, mesh_object, clips=None, scoped=False):
+    """
+    Evaluates the object at each frame of the clips, the scene range by default.
+    The clips sharing an action are sampled together, each frame once, in a single pass over the timeline.
+    With `scoped` only the collections holding dependencies of the object are evaluated, see scoped_evaluation.
+    Returns a copy of the first frame mesh and the vertex positions and normals of each frame, in reverse order.
+    """
+    clips = clips or [VertexClip("default", frame_range(context.scene))]
+    animated_object = get_animated_object(mesh_object)
+
+    # Frames to sample per action, in the order the actions are first used
+    samples = {}
+    for clip in clips:
+        samples.setdefault(clip.action, set()).update(clip.frames)
+    sample_count = sum(len(frames) for frames in samples.values())
+    if sample_count == 0:
+        raise ValueError(f"'{mesh_object.name}' has no frames to sample")
+
+    rows = {}
+    frame_times = []
+    base_mesh = None
+    positions = vertex_normals = None
+    try:
+        with scoped_evaluation(context, mesh_object, enabled=scoped) as evaluate_frame:
+            for action, frames in samples.items():
+                with use_action(animated_object, action):
+                    for frame in sorted(frames):
+                        start = time.perf_counter()
+                        eval_object = mesh_object.evaluated_get(evaluate_frame(frame))
+                        frame_times.append(time.perf_counter() - start)
+
+                        if base_mesh is None:
+                            base_mesh = bpy.data.meshes.new_from_object(eval_object)
+                            base_mesh.name = f"{mesh_object.name}_frame_{frame}"
+                            vertex_count = len(base_mesh.vertices)
+                            positions = np.empty((sample_count, vertex_count, 3), dtype=np.float32)
+                            vertex_normals = np.empty((sample_count, vertex_count, 3), dtype=np.float32)
+
+                        # The temporary mesh is freed before evaluating the next frame
+                        mesh = eval_object.to_mesh()
+                        try:
+                            if len(mesh.vertices) != vertex_count:
+                                raise ValueError(f"'{mesh_object.name}' changes vertex count at frame {frame}")
+                            row = rows[action, frame] = len(rows)
+                            mesh.vertices.foreach_get("co", positions[row].reshape(-1))
+                            mesh.vertices.foreach_get("normal", vertex_normals[row].reshape(-1))
+                        finally:
+                            eval_object.to_mesh_clear()
+    except BaseException:
+        # The copy of the first frame is not returned, it would be left in bpy.data
+        if base_mesh is not None:
+            bpy.data.meshes.remove(base_mesh)
+        raise
+
+    record_frame_times(frame_times, scoped)
+
+    # Clips in order, the last frame of the last clip first
+    order = [rows[clip.action, frame] for clip in reversed(clips) for frame in reversed(clip.frames)]
+
+    # The offsets are relative to the first frame of the first clip, which may not be the first one sampled
+    if order[-1] != 0:
+        base_mesh.vertices.foreach_set("co", positions[order[-1]].reshape(-1))
+        base_mesh.update()
+
+    return base_mesh, positions[order], vertex_normals[order]
+
+
+def create_export_mesh_object(context, mesh_data, layout: VertexLayout):
     """Return a mesh object with correct UVs"""
     while len(mesh_data.uv_layers) < 2:
         mesh_data.uv_layers.new()
     uv_layer = mesh_data.uv_layers[1]
 
     uv_layer.name = "vertex_anim"
-    for loop in mesh_data.loops:
-        uv_layer.data[loop.index].uv = ((loop.vertex_index + 0.5) / len(mesh_data.vertices), 128 / 255)
+    uvs = layout.uvs()
+    if not layout.is_folded:
+        # Unfolded textures keep the original V coordinate
+        uvs[:, 1] = 128 / 255
+    write_vertex_uvs(mesh_data, "vertex_anim", uvs)
     ob = bpy.data.objects.new("export_mesh", mesh_data)
     context.scene.collection.objects.link(ob)
     return ob
 
 
-def get_vertex_data(mesh_per_frame):
-    """Return lists of vertex offsets and normals from a list of mesh data"""
-    original = mesh_per_frame[0].vertices
-    offsets = []
-    normals = []
-    for mesh in reversed(mesh_per_frame):
-        for v in mesh.vertices:
-            offset = v.co - original[v.index].co
-            x, y, z = offset
-            # The order must be aligned with bpy.ops.export_scene.fbx
-            offsets.extend((-y, z, x, 1))
-            x, y, z = v.normal
-            normals.extend(((x + 1) * 0.5, (-y + 1) * 0.5, (z + 1) * 0.5, 1))
-    return offsets, normals
-
-
-def frame_range(scene):
-    """Return a range object with with scene's frame start, end, and step"""
-    return range(scene.frame_start, scene.frame_end, scene.frame_step)
+def get_vertex_offsets(positions):
+    """Return the offsets of each frame from the first frame, which is the last row, in the FBX axes"""
+    return to_export_axes(positions - positions[-1])
 
 
-def bake_vertex_data(offsets, normals, size):
-    """Stores vertex offsets and normals in seperate image textures"""
+def to_export_axes(vectors):
+    """Remaps vectors to the axes of the exported FBX"""
+    # The order must be aligned with bpy.ops.export_scene.fbx
+    return np.stack((-vectors[..., 1], vectors[..., 2], vectors[..., 0]), axis=-1)
 
-    width, height = size
 
-    offset_texture = bpy.data.images.new(name="offsets", width=width, height=height, alpha=True, float_buffer=True)
+def save_offset_texture(offset_texture, save_path: Path):
+    """Saves the offsets texture as an OpenEXR file"""
+    offset_texture.file_format = "OPEN_EXR"
 
-    normal_texture = bpy.data.images.new(name="normals", width=width, height=height, alpha=True)
+    with bpy.context.temp_override(edit_image=offset_texture):
+        bpy.ops.image.save_as(
+            filepath=str(save_path),
+            save_as_render=True,
+            check_existing=False,
+            copy=True,
+        )
 
-    offset_texture.pixels = offsets
-    normal_texture.pixels = normals
 
-    return offset_texture, normal_texture
+def save_data_image(context, image, save_path: Path, file_format, color_depth):
+    """
+    Saves an image holding raw data with the given format, without any color transform.
+    The output settings of the scene are used for the save and restored afterwards.
+    """
+    settings = context.scene.render.image_settings
+    backup = (settings.file_format, settings.color_mode, settings.color_depth, settings.exr_codec)
+    color_backup = (settings.color_management, settings.view_settings.view_transform)
+    image.colorspace_settings.is_data = True
+
+    try:
+        settings.file_format = file_format
+        settings.color_mode = "RGBA"
+        settings.color_depth = color_depth
+        if file_format == "OPEN_EXR":
+            settings.exr_codec = "ZIP"
+        settings.color_management = "OVERRIDE"
+        settings.view_settings.view_transform = "Raw"
+        image.save_render(str(save_path), scene=context.scene)
+    finally:
+        # The override view transform is restored before the override itself, then the format it depends on
+        settings.view_settings.view_transform = color_backup[1]
+        settings.color_management = color_backup[0]
+        settings.file_format, settings.color_mode, settings.color_depth, settings.exr_codec = backup
+
+
+def write_metadata(metadata, save_path: Path):
+    write_atomic(save_path, json.dumps(metadata, indent=2).encode("utf-8"))
 
 
 def remove_debug_meshes(context):
@@ -79,42 +166,172 @@ def remove_debug_meshes(context):
         bpy.data.objects.remove(ob, do_unlink=True)
 
 
-def debug_create_meshes(context, mesh_object, mesh_per_frame):
+def debug_create_meshes(context, mesh_object, base_mesh, positions):
     """Create debug meshes for each frame in the scene"""
 
-    for i, mesh_data in enumerate(mesh_per_frame):
+    for i, frame_positions in enumerate(reversed(positions)):
         name = f"__debug__{mesh_object.name}_{i:03d}"
+        mesh_data = base_mesh.copy()
+        mesh_data.vertices.foreach_set("co", frame_positions.reshape(-1))
         ob = bpy.data.objects.new(name, mesh_data)
         context.scene.collection.objects.link(ob)
         ob.location = mesh_object.location + Vector([1, 0, 0]) + Vector([0, 1, 0]) * i
 
 
-def export_vertex_animation(context, mesh_object, export_path: Path):
-    # Export the mesh data per frame
-    mesh_per_frame = get_per_frame_mesh_data(context, mesh_object)
-    frame_count = len(mesh_per_frame)
-    vertex_count = len(mesh_per_frame[0].vertices)
-
-    # This mesh contains the UV coordinates for the vertex animation
-    mesh_to_export = create_export_mesh_object(context, mesh_per_frame[0].copy())
-    offsets, normals = get_vertex_data(mesh_per_frame)
+class VertexAnimationBake:
+    """Encoded vertex animation of an object, waiting to be written"""
+
+    def __init__(self, name, export_object, layout, pixels, metadata):
+        self.name = name
+        # Object to export, with the "vertex_anim" UV layer
+        self.export_object = export_object
+        self.layout = layout
+        # Pixels of the offsets texture (rows, columns, RGBA), row 0 is the bottom of the image
+        self.pixels = pixels
+        self.metadata = metadata
+
+    @property
+    def size(self):
+        height, width, _ = self.pixels.shape
+        return width, height
+
+
+def bake_vertex_animation(context, mesh_object, name, clips=None):
+    """Samples and encodes the vertex animation of an object, for the given clips or the scene range"""
+    settings = context.scene.asset_settings
+    clips = clips or get_vertex_clips(context, mesh_object)
+    if settings.vertex_animation_pack_normals:
+        # Checked before sampling, which is the slowest step
+        check_packed_normals(settings.vertex_animation_encoding)
+
+    # Sample the vertex data per frame
+    with stage("evaluate"):
+        base_mesh, positions, vertex_normals = sample_vertex_frames(
+            context, mesh_object, clips, settings.vertex_animation_scoped_evaluation
+        )
 
-    # debug_create_meshes(context, mesh_object, mesh_per_frame)
+    mesh_to_export = None
+    try:
+        # Rows are in reverse order, the reduction works on the frames of each clip
+        if settings.vertex_animation_reduce:
+            with stage("reduce"):
+                rows = []
+                start = 0
+                for clip in clips:
+                    clip_rows = np.arange(len(positions) - 1 - start, len(positions) - 1 - start - len(clip.frames), -1)
+                    kept = reduce_frames(positions[clip_rows], settings.vertex_animation_tolerance)
+                    rows.append(clip_rows[kept])
+                    clip.frames = [clip.frames[i] for i in kept]
+                    start += len(clip_rows)
+                rows = np.concatenate(rows)[::-1]
+                positions = positions[rows]
+                vertex_normals = vertex_normals[rows]
+
+        with stage("bake"):
+            frame_count, vertex_count, _ = positions.shape
+            layout = VertexLayout(
+                vertex_count,
+                frame_count,
+                settings.vertex_animation_max_width,
+                settings.vertex_animation_power_of_two,
+            )
+
+            # This mesh contains the UV coordinates for the vertex animation
+            mesh_to_export = create_export_mesh_object(context, base_mesh, layout)
+
+            # debug_create_meshes(context, mesh_object, base_mesh, positions)
+
+            offsets = get_vertex_offsets(positions)
+            normals = to_export_axes(vertex_normals) if settings.vertex_animation_pack_normals else None
+            del positions, vertex_normals
+            pixels, metadata = encode_vertex_animation(offsets, normals, settings.vertex_animation_encoding)
+            del offsets, normals
+            pixels = layout.fold(pixels)
+    except BaseException:
+        # Nothing is returned to the caller, which would remove it
+        if mesh_to_export is not None:
+            remove_export_mesh_object(mesh_to_export)
+        else:
+            bpy.data.meshes.remove(base_mesh)
+        raise
+
+    # The rows of the first block are at the bottom of the image and hold the last frame of the last clip
+    metadata["frames"] = [frame for clip in clips for frame in clip.frames]
+    metadata["clips"] = get_clip_table(clips, layout)
+    metadata["layout"] = layout.metadata()
+    return VertexAnimationBake(name, mesh_to_export, layout, pixels, metadata)
+
+
+def get_clip_table(clips, layout: VertexLayout):
+    """
+    Return the name, start row, length in frames and frame rate of each clip.
+    The start row is the first row of the clip's first frame, the next frames are `rows_per_frame` rows below.
+    """
+    table = []
+    end = layout.frame_count
+    for clip in clips:
+        table.append(
+            dict(
+                name=clip.name,
+                start_row=(end - 1) * layout.rows_per_frame,
+                length=len(clip.frames),
+                fps=clip.fps,
+            )
+        )
+        end -= len(clip.frames)
+    return table
 
-    offset_texture, normal_texture = bake_vertex_data(offsets, normals, (vertex_count, frame_count))
 
-    save_path = export_path / f"{mesh_object.name}_offsets.exr"
-    offset_texture.file_format = "OPEN_EXR"
+def get_vertex_texture_paths(context, export_path: Path, name):
+    """Return the paths of the offsets texture and of its JSON description"""
+    _file_format, _color_depth, extension = encoding_formats[context.scene.asset_settings.vertex_animation_encoding]
+    return export_path / f"{name}_offsets.{extension}", export_path / f"{name}_offsets.json"
 
-    with bpy.context.temp_override(edit_image=offset_texture):
-        bpy.ops.image.save_as(
-            filepath=str(save_path),
-            save_as_render=True,
-            check_existing=False,
-            copy=True,
-        )
 
-    # for m in mesh_per_frame:
-    #     bpy.data.meshes.remove(m)
+def write_vertex_texture(context, pixels, metadata, export_path: Path, name, report=None):
+    """
+    Writes the offsets texture and its JSON description, returns the path of the texture.
+    `report` has the same signature as Operator.report.
+    """
+    encoding = context.scene.asset_settings.vertex_animation_encoding
+    file_format, color_depth, _extension = encoding_formats[encoding]
 
-    return mesh_to_export
+    height, width, _ = pixels.shape
+    offset_texture = bpy.data.images.new(name="offsets", width=width, height=height, alpha=True, float_buffer=True)
+    offset_texture.pixels.foreach_set(pixels.reshape(-1))
+
+    save_path, metadata_path = get_vertex_texture_paths(context, export_path, name)
+    metadata = dict(metadata, texture=save_path.name, width=width, height=height)
+    if report:
+        frames = len(metadata.get("frames", ()))
+        report({"INFO"}, f"Vertex animation '{save_path.name}': {width}x{height} pixels, {frames} frames")
+
+    try:
+        with stage("image_save"), staged_file(save_path) as staging_path:
+            if encoding == "FLOAT":
+                save_offset_texture(offset_texture, staging_path)
+            else:
+                save_data_image(context, offset_texture, staging_path, file_format, color_depth)
+        run_in_background(write_metadata, metadata, metadata_path)
+    finally:
+        bpy.data.images.remove(offset_texture)
+
+    return save_path
+
+
+def export_vertex_animation(context, mesh_object, export_path: Path, clips=None, name=None, report=None):
+    """Bakes and writes the vertex animation, `name` names the texture and defaults to the object name"""
+    bake = bake_vertex_animation(context, mesh_object, name or mesh_object.name, clips)
+    try:
+        write_vertex_texture(context, bake.pixels, bake.metadata, export_path, bake.name, report)
+    except BaseException:
+        remove_export_mesh_object(bake.export_object)
+        raise
+    return bake.export_object
+
+
+def remove_export_mesh_object(mesh_to_export):
+    """Remove the object returned by export_vertex_animation together with its mesh"""
+    mesh_data = mesh_to_export.data
+    bpy.data.objects.remove(mesh_to_export, do_unlink=True)
+    bpy.data.meshes.remove(mesh_data)
@@ -0,0 +1,54 @@
+from pathlib import Path
+
+import numpy as np
+
+from .mesh_arrays import write_vertex_uvs
+from .profiling import stage
+from .vertex_animation import write_vertex_texture
+
+
+def pack_atlas(sizes, max_width):
+    """
+    Packs rectangles in rows (shelves), the tallest first.
+    Rectangles wider than `max_width` get a row of their own.
+    Returns the atlas size and the (x, y) offset of each rectangle.
+    """
+
+    width = max([max_width, *(w for w, _h in sizes)])
+    offsets = [None] * len(sizes)
+    x = y = shelf_height = used_width = 0
+    for i in sorted(range(len(sizes)), key=lambda it: sizes[it][1], reverse=True):
+        w, h = sizes[i]
+        if x > 0 and x + w > width:
+            y += shelf_height
+            x = shelf_height = 0
+        offsets[i] = (x, y)
+        x += w
+        shelf_height = max(shelf_height, h)
+        used_width = max(used_width, x)
+    return (used_width, y + shelf_height), offsets
+
+
+def write_vertex_animation_atlas(context, bakes, export_path: Path, name, max_width, report=None):
+    """
+    Packs several vertex animation bakes in a single texture, and rewrites the "vertex_anim" UVs
+    of each exported object to address its own region. Returns the path of the texture.
+    """
+
+    with stage("bake"):
+        (width, height), offsets = pack_atlas([bake.size for bake in bakes], max_width)
+        pixels = np.zeros((height, width, 4), dtype=np.float32)
+        pixels[..., 3] = 1
+
+        regions = {}
+        for bake, (x, y) in zip(bakes, offsets):
+            w, h = bake.size
+            pixels[y : y + h, x : x + w] = bake.pixels
+            regions[bake.name] = dict(bake.metadata, x=x, y=y, width=w, height=h)
+
+            # UVs address the pixels of the first frame block of the region
+            uvs = bake.layout.uvs((x, y), (width, height))
+            write_vertex_uvs(bake.export_object.data, "vertex_anim", uvs)
+
+    metadata = {"atlas": True, "regions": regions}
+    return write_vertex_texture(context, pixels, metadata, export_path, name, report)
@@ -0,0 +1,160 @@
+from contextlib import contextmanager
+
+import bpy
+
+
+class VertexClip:
+    """Frames of a vertex animation clip, sampled with `action` assigned to the animated object"""
+
+    def __init__(self, name, frames, action=None, fps=24.0):
+        self.name = name
+        self.frames = list(frames)
+        # None keeps the animation of the object as it is
+        self.action = action
+        self.fps = fps
+
+
+def frame_range(scene):
+    """Return a range object with with scene's frame start, end, and step"""
+    return range(scene.frame_start, scene.frame_end, scene.frame_step)
+
+
+def get_vertex_clips(context, mesh_object):
+    """
+    Return the clips declared on the object, or a single clip with the scene range if there are none.
+    Raises ValueError if a clip has no frames.
+    """
+    scene = context.scene
+    fps = scene.render.fps / scene.render.fps_base
+
+    clips = []
+    for clip in mesh_object.export_properties.vertex_animation_clips:
+        frames = range(clip.frame_start, clip.frame_end, clip.frame_step)
+        clips.append(VertexClip(clip.name, frames, clip.action, fps / clip.frame_step))
+
+    if not clips:
+        clips.append(VertexClip("default", frame_range(scene), None, fps / scene.frame_step))
+
+    for clip in clips:
+        if not clip.frames:
+            raise ValueError(
+                f"Vertex animation clip '{clip.name}' of '{mesh_object.name}' has no frames, "
+                "its end frame must be after its start frame"
+            )
+    return clips
+
+
+def get_animated_object(mesh_object):
+    """Return the object driving the deformation, the armature of the first Armature modifier or the object itself"""
+    for modifier in mesh_object.modifiers:
+        if modifier.type == "ARMATURE" and modifier.object:
+            return modifier.object
+    return mesh_object
+
+
+@contextmanager
+def use_action(obj, action):
+    """Assigns an action to the object temporarily, with the NLA disabled so that only the action plays"""
+    if action is None:
+        yield
+        return
+
+    had_animation_data = obj.animation_data is not None
+    animation_data = obj.animation_data or obj.animation_data_create()
+    backup = (animation_data.action, animation_data.use_nla)
+    slot = getattr(animation_data, "action_slot", None)
+
+    animation_data.action = action
+    animation_data.use_nla = False
+    try:
+        yield
+    finally:
+        if not had_animation_data:
+            obj.animation_data_clear()
+        else:
+            animation_data.action, animation_data.use_nla = backup
+            if slot is not None:
+                animation_data.action_slot = slot
+
+
+class VertexAnimationClipAdd(bpy.types.Operator):
+    """Add a vertex animation clip with the scene frame range"""
+
+    bl_idname = "object.vertex_animation_clip_add"
+    bl_label = "Add Clip"
+    bl_options = {"REGISTER", "UNDO"}
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None
+
+    def execute(self, context):
+        scene = context.scene
+        props = context.active_object.export_properties
+        clip = props.vertex_animation_clips.add()
+        clip.name = f"clip_{len(props.vertex_animation_clips)}"
+        clip.frame_start = scene.frame_start
+        clip.frame_end = scene.frame_end
+        clip.frame_step = scene.frame_step
+        props.vertex_animation_clip_index = len(props.vertex_animation_clips) - 1
+        return {"FINISHED"}
+
+
+class VertexAnimationClipRemove(bpy.types.Operator):
+    """Remove the selected vertex animation clip"""
+
+    bl_idname = "object.vertex_animation_clip_remove"
+    bl_label = "Remove Clip"
+    bl_options = {"REGISTER", "UNDO"}
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None and len(context.active_object.export_properties.vertex_animation_clips)
+
+    def execute(self, context):
+        props = context.active_object.export_properties
+        props.vertex_animation_clips.remove(props.vertex_animation_clip_index)
+        props.vertex_animation_clip_index = max(0, props.vertex_animation_clip_index - 1)
+        return {"FINISHED"}
+
+
+class VertexAnimationClipsFromNLA(bpy.types.Operator):
+    """Replace the vertex animation clips with one clip per NLA strip of the animated object"""
+
+    bl_idname = "object.vertex_animation_clips_from_nla"
+    bl_label = "Clips from NLA"
+    bl_options = {"REGISTER", "UNDO"}
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None
+
+    def execute(self, context):
+        props = context.active_object.export_properties
+        animated_object = get_animated_object(context.active_object)
+        animation_data = animated_object.animation_data
+        strips = [strip for track in animation_data.nla_tracks for strip in track.strips] if animation_data else []
+        strips = [strip for strip in strips if strip.action and not strip.mute]
+        if not strips:
+            self.report({"WARNING"}, f"'{animated_object.name}' has no NLA strips")
+            return {"CANCELLED"}
+
+        props.vertex_animation_clips.clear()
+        for strip in strips:
+            clip = props.vertex_animation_clips.add()
+            clip.name = strip.name
+            clip.action = strip.action
+            clip.frame_start = int(strip.action_frame_start)
+            clip.frame_end = int(strip.action_frame_end)
+            clip.frame_step = context.scene.frame_step
+        props.vertex_animation_clip_index = 0
+
+        self.report({"INFO"}, f"Created {len(strips)} clips from '{animated_object.name}'")
+        return {"FINISHED"}
+
+
+clip_classes = [
+    VertexAnimationClipAdd,
+    VertexAnimationClipRemove,
+    VertexAnimationClipsFromNLA,
+]
@@ -0,0 +1,207 @@
+import numpy as np
+
+# Items of the vertex animation encoding enum: (identifier, name, description)
+vertex_encodings = [
+    ("FLOAT", "Float EXR", "RGBA 32-bit float OpenEXR, lossless"),
+    ("HALF", "Half EXR", "RGBA 16-bit float OpenEXR, half the size of the float encoding"),
+    ("PNG16", "16-bit PNG", "RGBA 16-bit PNG, offsets quantized between the bounds of the clip"),
+]
+
+# File format, color depth and extension used to save each encoding
+encoding_formats = {
+    "FLOAT": ("OPEN_EXR", "32", "exr"),
+    "HALF": ("OPEN_EXR", "16", "exr"),
+    "PNG16": ("PNG", "16", "png"),
+}
+
+# Blender saves 16-bit PNG as premultiplied alpha, the offsets would be divided by the normals packed in alpha
+packed_normal_encodings = {"FLOAT", "HALF"}
+
+
+def check_packed_normals(encoding):
+    if encoding not in packed_normal_encodings:
+        raise ValueError(f"Normals cannot be packed in the alpha channel of the '{encoding}' encoding")
+
+
+def encode_octahedral(normals):
+    """
+    Encodes unit vectors to octahedral coordinates in [0, 1].
+    Returns an array with the same leading shape and 2 components.
+    """
+    normals = normals.astype(np.float64)
+    normals = normals / np.maximum(np.abs(normals).sum(axis=-1, keepdims=True), 1e-12)
+    x, y, z = normals[..., 0], normals[..., 1], normals[..., 2]
+    sign_x = np.where(x >= 0, 1.0, -1.0)
+    sign_y = np.where(y >= 0, 1.0, -1.0)
+    folded_x = np.where(z < 0, (1 - np.abs(y)) * sign_x, x)
+    folded_y = np.where(z < 0, (1 - np.abs(x)) * sign_y, y)
+    return np.stack((folded_x, folded_y), axis=-1) * 0.5 + 0.5
+
+
+def decode_octahedral(encoded):
+    """Inverse of encode_octahedral"""
+    xy = encoded.astype(np.float64) * 2 - 1
+    x, y = xy[..., 0], xy[..., 1]
+    z = 1 - np.abs(x) - np.abs(y)
+    t = np.maximum(-z, 0)
+    x = x - np.where(x >= 0, t, -t)
+    y = y - np.where(y >= 0, t, -t)
+    normals = np.stack((x, y, z), axis=-1)
+    return normals / np.maximum(np.linalg.norm(normals, axis=-1, keepdims=True), 1e-12)
+
+
+def pack_octahedral(normals, bits=8):
+    """
+    Packs octahedral normals as two `bits` values in a single channel in [0, 1].
+    8 bits are exact in 16-bit and float32 channels, half floats need 5 bits.
+    """
+    levels = (1 << bits) - 1
+    quantized = np.round(encode_octahedral(normals) * levels).astype(np.int64)
+    return (quantized[..., 0] * (1 << bits) + quantized[..., 1]) / ((1 << (2 * bits)) - 1)
+
+
+def unpack_octahedral(packed, bits=8):
+    """Inverse of pack_octahedral"""
+    levels = (1 << bits) - 1
+    code = np.round(packed.astype(np.float64) * ((1 << (2 * bits)) - 1)).astype(np.int64)
+    return decode_octahedral(np.stack((code >> bits, code & levels), axis=-1) / levels)
+
+
+def reduce_frames(frames, tolerance):
+    """
+    Return the indices of the frames to keep, in order.
+    A frame is dropped when every vertex is within `tolerance` of the linear interpolation
+    between the kept frames around it. The first and the last frame are always kept.
+    """
+
+    count = len(frames)
+    if count <= 2:
+        return list(range(count))
+
+    kept = [0]
+    anchor = 0
+    for candidate in range(2, count):
+        # Check if the frames between the anchor and the candidate can be interpolated
+        t = (np.arange(anchor + 1, candidate) - anchor) / (candidate - anchor)
+        start = frames[anchor].astype(np.float64)
+        interpolated = start + t[:, None, None] * (frames[candidate] - start)
+        error = np.linalg.norm(frames[anchor + 1 : candidate] - interpolated, axis=-1).max()
+        if error > tolerance:
+            anchor = candidate - 1
+            kept.append(anchor)
+    kept.append(count - 1)
+    return kept
+
+
+def encode_vertex_animation(offsets, normals, encoding):
+    """
+    Encodes the vertex offsets (frame, vertex, 3) into RGBA pixels for the given encoding.
+    If `normals` are given they are packed as octahedral coordinates in the alpha channel, otherwise alpha is 1.
+    Returns the pixels as float32 and the metadata describing how to decode them, including the quantization error.
+    """
+
+    if normals is not None:
+        check_packed_normals(encoding)
+
+    rgb = offsets.astype(np.float64)
+    metadata = {"encoding": encoding}
+
+    if encoding == "PNG16":
+        bounds_min = rgb.reshape(-1, 3).min(axis=0) if rgb.size else np.zeros(3)
+        bounds_max = rgb.reshape(-1, 3).max(axis=0) if rgb.size else np.zeros(3)
+        extent = np.where(bounds_max > bounds_min, bounds_max - bounds_min, 1)
+        encoded = np.round((rgb - bounds_min) / extent * 65535) / 65535
+        decoded = encoded * extent + bounds_min
+        metadata["bounds_min"] = bounds_min.tolist()
+        metadata["bounds_max"] = bounds_max.tolist()
+    elif encoding == "HALF":
+        encoded = rgb.astype(np.float16).astype(np.float64)
+        decoded = encoded
+    else:
+        encoded = rgb.astype(np.float32).astype(np.float64)
+        decoded = encoded
+
+    pixels = np.empty((*offsets.shape[:-1], 4), dtype=np.float32)
+    pixels[..., :3] = encoded
+    pixels[..., 3] = 1
+    metadata["max_error"] = float(np.abs(decoded - rgb).max()) if rgb.size else 0.0
+
+    if normals is not None:
+        bits = 5 if encoding == "HALF" else 8
+        packed = pack_octahedral(normals, bits)
+        if encoding == "HALF":
+            packed = packed.astype(np.float16)
+        pixels[..., 3] = packed
+        unpacked = unpack_octahedral(pixels[..., 3], bits)
+        reference = normals / np.maximum(np.linalg.norm(normals, axis=-1, keepdims=True), 1e-12)
+        cosine = np.clip((unpacked * reference).sum(axis=-1), -1, 1)
+        metadata["normals"] = "octahedral"
+        metadata["normal_bits"] = bits
+        metadata["max_normal_error_degrees"] = float(np.degrees(np.arccos(cosine)).max()) if cosine.size else 0.0
+    else:
+        metadata["normals"] = "none"
+
+    return pixels, metadata
+
+
+def next_power_of_two(value):
+    return 1 << max(int(value) - 1, 0).bit_length()
+
+
+class VertexLayout:
+    """
+    Position of each vertex in the texture, computed once per mesh and shared by all the frames.
+    When the vertices do not fit in `max_width` columns, each frame is folded in several consecutive rows.
+    """
+
+    def __init__(self, vertex_count, frame_count, max_width, power_of_two=False):
+        columns = min(max(vertex_count, 1), max_width)
+        if power_of_two:
+            columns = next_power_of_two(columns)
+            if columns > max_width:
+                columns //= 2
+        rows_per_frame = -(-vertex_count // columns)
+        height = frame_count * rows_per_frame
+        if power_of_two:
+            height = next_power_of_two(height)
+
+        self.vertex_count = vertex_count
+        self.frame_count = frame_count
+        self.columns = columns
+        self.rows_per_frame = rows_per_frame
+        self.size = (columns, height)
+
+        indices = np.arange(vertex_count)
+        self.vertex_columns = indices % columns
+        self.vertex_rows = indices // columns
+
+    @property
+    def is_folded(self):
+        """False when the texture is a single row per frame, with one column per vertex"""
+        return self.size != (self.vertex_count, self.frame_count)
+
+    def fold(self, pixels):
+        """Moves the pixels (frame, vertex, RGBA) to their place in the texture (row, column, RGBA)"""
+        width, height = self.size
+        folded = np.zeros((height, width, pixels.shape[-1]), dtype=pixels.dtype)
+        folded[..., 3] = 1
+        blocks = folded[: self.frame_count * self.rows_per_frame].reshape(
+            self.frame_count, self.rows_per_frame, width, -1
+        )
+        blocks[:, self.vertex_rows, self.vertex_columns] = pixels
+        return folded
+
+    def uvs(self, offset=(0, 0), size=None):
+        """
+        Return the UV coordinates (vertex, 2) of the pixel centers in the first frame,
+        for a texture of `size` in which the layout starts at `offset`.
+        """
+        x, y = offset
+        width, height = size or self.size
+        uvs = np.empty((self.vertex_count, 2), dtype=np.float32)
+        uvs[:, 0] = (x + self.vertex_columns + 0.5) / width
+        uvs[:, 1] = (y + self.vertex_rows + 0.5) / height
+        return uvs
+
+    def metadata(self):
+        return {"columns": self.columns, "rows_per_frame": self.rows_per_frame}